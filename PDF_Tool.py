@@ -1,27 +1,203 @@
+import io
 import os
 import sys
+import mmap
+import json
+import time
+import cProfile
+import hashlib
+import functools
+import tracemalloc
+import multiprocessing
 import fitz  # PyMuPDF
-from typing import Tuple
+from dataclasses import dataclass, asdict
+from typing import List, Tuple
 from enum import Enum
 
 
+def get_peak_rss(children: bool = False) -> "int | None":
+    """Peak resident set size in bytes, None where unsupported.
+
+    With children=True it is the largest of the terminated child processes.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
 def get_resource_path(relative_path):
     try:
         # PyInstaller creates a temp folder and stores path in _MEIPASS
         base_path = sys._MEIPASS
     except Exception:
-        base_path = os.path.abspath(".")
+        base_path = os.path.dirname(os.path.abspath(__file__))
 
     return os.path.join(base_path, relative_path)
 
 
+# Info page documents by path, shared by all PDF_Tool instances of a process
+_info_page_templates = {}
+
+# Content boxes of recently checked inputs, see PDF_Tool.runPreflight
+PREFLIGHT_CACHE_ENTRIES = 8
+_preflight_pages = {}
+
+
+def _timed_stage(count_pages):
+    """Record a StageTiming for every outermost call of a pipeline method.
+
+    count_pages(tool) returns the number of pages the stage handled.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.stage_depth:
+                return method(self, *args, **kwargs)
+
+            self.stage_depth += 1
+            if self.profiler:
+                self.profiler.enable()
+                tracemalloc.reset_peak()
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                wall = time.perf_counter() - wall_start
+                cpu = time.process_time() - cpu_start
+                traced_peak = None
+                if self.profiler:
+                    self.profiler.disable()
+                    _, traced_peak = tracemalloc.get_traced_memory()
+                self.stage_depth -= 1
+                try:
+                    pages = count_pages(self)
+                except Exception:
+                    pages = 0
+                self.timings.append(
+                    PDF_Tool.StageTiming(
+                        method.__name__, wall, cpu, pages, get_peak_rss(), traced_peak
+                    )
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def _output_pages(tool) -> int:
+    return tool.output_pdf.page_count
+
+
+def _content_pages(tool) -> int:
+    return tool.output_pdf.page_count - tool.info_page_count
+
+
 class PDF_Tool:
+    class Cancelled(Exception):
+        pass
+
+    @dataclass
+    class StageTiming:
+        stage: str
+        wall_time: float
+        cpu_time: float
+        pages: int
+        # ru_maxrss of the whole process so far, not of this stage alone
+        process_peak_rss: "int | None"
+        # Peak traced Python memory during the stage, only when profiling
+        traced_peak: "int | None" = None
+
     class Color(Enum):
         RED = (1, 0, 0)
         GREEN = (0, 1, 0)
         ORANGE = (1, 0.5, 0)
         PINK = (1, 0, 1)
 
+    @dataclass
+    class PageGeometry:
+        # Everything in points, frame rects in output page coordinates
+        output_width: float
+        output_height: float
+        placement: fitz.Rect
+        netto: fitz.Rect
+        bleed: fitz.Rect
+        safe_margin: fitz.Rect
+
+        def frames(
+            self, netto: bool = True, bleed: bool = True, safe_margin: bool = True
+        ) -> "List[Tuple[fitz.Rect, PDF_Tool.Color]]":
+            frames = []
+            if netto:
+                frames.append((self.netto, PDF_Tool.Color.ORANGE))
+            if bleed:
+                frames.append((self.bleed, PDF_Tool.Color.PINK))
+            if safe_margin:
+                frames.append((self.safe_margin, PDF_Tool.Color.GREEN))
+            return frames
+
+    @dataclass
+    class PreflightResult:
+        # page is the 0-based source page number
+        page: int
+        # Text, drawings and images within the netto format but beyond the
+        # safe margin; text anywhere beyond the safe margin counts as well
+        outside_safe: int
+        # Sides where artwork reaches the netto format edge but not the bleed
+        short_bleed: Tuple[str, ...]
+
+        @property
+        def passed(self) -> bool:
+            return not self.outside_safe and not self.short_bleed
+
+        def describe(self) -> str:
+            problems = []
+            if self.outside_safe:
+                problems.append(f"{self.outside_safe} object(s) outside safe margin")
+            if self.short_bleed:
+                problems.append(f"short of bleed: {', '.join(self.short_bleed)}")
+            return "; ".join(problems) or "OK"
+
+    class SaveProfile(Enum):
+        # Keyword arguments for fitz.Document.save
+        FAST = {}
+        COMPACT = {
+            "garbage": 3,
+            "deflate": True,
+            "deflate_images": True,
+            "deflate_fonts": True,
+            "use_objstms": 1,
+        }
+        WEB = {
+            "garbage": 3,
+            "deflate": True,
+            "deflate_images": True,
+            "deflate_fonts": True,
+            "clean": True,
+            "linear": True,
+        }
+
+    class FrameMode(Enum):
+        # ANNOTATIONS: three rect annotations per page, editable in viewers
+        # VECTOR: page content drawn from one shared Form XObject per page size
+        ANNOTATIONS = "annotations"
+        VECTOR = "vector"
+
+    # Name of the optional content group holding vector frames
+    FRAME_LAYER_NAME = "Frames"
+
+    # Keys updateAnnotations copies between frame annotations of one page size
+    FRAME_ANNOTATION_KEYS = ("Type", "Subtype", "Rect", "RD", "C", "F", "BS", "AP")
+
+    # Points content may overshoot a frame edge before preflight flags it
+    PREFLIGHT_TOLERANCE = 0.5
+
     def __init__(self):
         self.original_pdf: fitz.Document
         self.output_pdf: fitz.Document
@@ -30,7 +206,33 @@ class PDF_Tool:
         self.safe_margin_size_pts: float
         self.additional_margin_pts: float
         self.info_page_added: bool = False
+        self.info_page_count: int = 0
         self.annotation_width: float = 1
+        self.input_pdf_path: str = ""
+        # The path or in-memory PDF given to loadPDF
+        self.input_source = None
+        # memoryview created for an mmap input, released by close()
+        self.input_view = None
+        self.built_for = None
+        self.deduplicate_resources: bool = False
+        self.deduplicated_bytes: int = 0
+        self.save_profile: PDF_Tool.SaveProfile = self.SaveProfile.FAST
+        self.frame_mode: PDF_Tool.FrameMode = self.FrameMode.ANNOTATIONS
+        self.frame_layer: bool = True
+        # (frames, line width, page size) -> one page document with the frames
+        self.frame_documents = {}
+        # Source page size -> PageGeometry, cleared by the geometry setters
+        self.page_geometries = {}
+        self.preflight_results: List[PDF_Tool.PreflightResult] = []
+        self.save_time: float = 0
+        self.save_size: int = 0
+        self.progress_callback = None
+        self.peak_rss = None
+        self.timings: List[PDF_Tool.StageTiming] = []
+        self.stage_depth: int = 0
+        self.profiler = None
+        self.profile_path: str = ""
+        self.cancel_requested: bool = False
 
     def __del__(self):
         self.close()
@@ -40,64 +242,218 @@ class PDF_Tool:
             width,
             height,
         )
+        self.page_geometries = {}
         return self
 
     def setBleedSize(self, bleed_size: float) -> "PDF_Tool":
         self.bleed_size = bleed_size
+        self.page_geometries = {}
         return self
 
     def setSafeMarginSize(self, safe_margin_size: float) -> "PDF_Tool":
         self.safe_margin_size = safe_margin_size
+        self.page_geometries = {}
         return self
 
     def setAdditionalMargin(self, margin: float) -> "PDF_Tool":
+        self.additional_margin = margin
         self.additional_margin_pts = self.convertMilimetersToPoints(margin)
+        self.page_geometries = {}
         return self
 
     def setAnnotationWidth(self, annotation_width: float) -> "PDF_Tool":
         self.annotation_width = annotation_width
         return self
 
-    def loadPDF(self, input_pdf_path: str) -> "PDF_Tool":
-        self.original_pdf = fitz.open(input_pdf_path)
+    def setSaveProfile(self, profile: "str | PDF_Tool.SaveProfile") -> "PDF_Tool":
+        if isinstance(profile, str):
+            profile = self.SaveProfile[profile.upper()]
+        self.save_profile = profile
+        return self
+
+    def setFrameMode(
+        self, mode: "str | PDF_Tool.FrameMode", layer: bool = True
+    ) -> "PDF_Tool":
+        # layer puts vector frames on a toggleable optional content group
+        if isinstance(mode, str):
+            mode = self.FrameMode[mode.upper()]
+        self.frame_mode = mode
+        self.frame_layer = layer
+        return self
+
+    def setProgressCallback(self, callback) -> "PDF_Tool":
+        # Called as callback(pages_done, pages_total) after every output page
+        self.progress_callback = callback
+        return self
+
+    def cancel(self) -> None:
+        # Safe to call from another thread, checked before every page
+        self.cancel_requested = True
+
+    def applySettings(self, settings: dict) -> "PDF_Tool":
+        # Settings are plain values (mm / pt) so they can be sent to worker processes
+        return (
+            self.setNettoFormat(*settings["netto_format"])
+            .setBleedSize(settings["bleed_size"])
+            .setSafeMarginSize(settings["safe_margin_size"])
+            .setAdditionalMargin(settings["additional_margin"])
+            .setAnnotationWidth(settings["annotation_width"])
+        )
+
+    def getSettings(self) -> dict:
+        return {
+            "netto_format": self.netto_format,
+            "bleed_size": self.bleed_size,
+            "safe_margin_size": self.safe_margin_size,
+            "additional_margin": self.additional_margin,
+            "annotation_width": self.annotation_width,
+        }
+
+    @_timed_stage(lambda tool: tool.original_pdf.page_count)
+    def loadPDF(self, source) -> "PDF_Tool":
+        """Open the input, a path or an in-memory PDF.
+
+        bytes, bytearray, memoryview and mmap objects are read without a copy
+        to disk; input_pdf_path stays empty for them. Other objects with a
+        read method (io.BytesIO, open files) are read into bytes first.
+        """
+        source = self.__readInput(source)
+        self.timings = []
+        if self.input_view is not None:
+            # The previous documents still read from the view
+            self.close()
+        self.original_pdf = self.__openInput(source)
         self.output_pdf = fitz.open()
-        print(f"Loaded PDF: {input_pdf_path}")
+        self.input_source = source
+        self.input_pdf_path = source if isinstance(source, (str, os.PathLike)) else ""
+        self.built_for = None
+        self.info_page_added = False
+        self.info_page_count = 0
+        self.deduplicate_resources = False
+        self.deduplicated_bytes = 0
+        if self.input_pdf_path:
+            print(f"Loaded PDF: {self.input_pdf_path}")
+        else:
+            print(f"Loaded PDF: {memoryview(source).nbytes} bytes in memory")
         print("Output PDF initialized.")
         return self
 
-    def addInfoPage(self, info_page_path: str = "raport.pdf") -> "PDF_Tool":
-        # Load the info page PDF
-        info_page_path = get_resource_path(info_page_path)
-        info_pdf = fitz.open(info_page_path)
+    @staticmethod
+    def __readInput(source):
+        if isinstance(
+            source, (str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap)
+        ):
+            return source
+        if hasattr(source, "read"):
+            return source.read()
+        raise TypeError(
+            f"Expected a path, bytes-like object or file-like object, "
+            f"got {type(source).__name__}"
+        )
 
-        # Insert all pages from the info PDF at the beginning
-        for i in range(info_pdf.page_count):
-            info_page = info_pdf[i]
-            # Create a new page with the same dimensions
-            new_page = self.output_pdf.new_page(
-                -1,  # Insert at the end initially
-                width=info_page.rect.width,
-                height=info_page.rect.height,
-            )
-            # Copy content from the info page
-            new_page.show_pdf_page(new_page.rect, info_pdf, i)
+    def __openInput(self, source) -> fitz.Document:
+        if isinstance(source, (str, os.PathLike)):
+            return fitz.open(source)
+        if isinstance(source, mmap.mmap):
+            # fitz.open rejects mmap objects, a memoryview shares their pages
+            if self.input_view is None:
+                self.input_view = memoryview(source)
+            source = self.input_view
+        return fitz.open(stream=source, filetype="pdf")
 
-        # Move all info pages to the beginning
-        page_count = self.output_pdf.page_count
-        info_page_count = info_pdf.page_count
+    def __releaseInputView(self) -> None:
+        if self.input_view is not None:
+            self.input_view.release()
+            self.input_view = None
 
-        # Move each info page to the beginning (in reverse to maintain order)
-        for i in range(info_page_count):
-            self.output_pdf.move_page(page_count - 1 - i, 0)
+    def loadCachedOutput(self, output_pdf_path: str, info_page: bool) -> "PDF_Tool":
+        """Use a previously saved result for the loaded input as output_pdf.
+
+        The file is read into memory so the cache may evict it meanwhile.
+        """
+        with open(output_pdf_path, "rb") as file:
+            data = file.read()
+        self.output_pdf.close()
+        self.output_pdf = fitz.open(stream=data, filetype="pdf")
+        self.info_page_added = info_page
+        self.info_page_count = self.getInfoPageTemplate().page_count if info_page else 0
+        self.built_for = self.__buildKey(self.input_source)
+        print(f"Loaded cached output: {output_pdf_path}")
+        return self
+
+    @staticmethod
+    def getInfoPageTemplate(info_page_path: str = "raport.pdf") -> fitz.Document:
+        """Ready-made info pages, built once per process.
+
+        The pages are placed with show_pdf_page once; every output then copies
+        them with insert_pdf instead of re-placing (and re-compressing) the
+        source content each time.
+        """
+        info_page_path = get_resource_path(info_page_path)
+        template = _info_page_templates.get(info_page_path)
+        if template is None:
+            template = fitz.open()
+            with fitz.open(info_page_path) as info_pdf:
+                for i in range(info_pdf.page_count):
+                    info_page = info_pdf[i]
+                    new_page = template.new_page(
+                        width=info_page.rect.width, height=info_page.rect.height
+                    )
+                    new_page.show_pdf_page(new_page.rect, info_pdf, i)
+            _info_page_templates[info_page_path] = template
+        return template
+
+    @_timed_stage(lambda tool: tool.info_page_count)
+    def addInfoPage(self, info_page_path: str = "raport.pdf") -> "PDF_Tool":
+        template = self.getInfoPageTemplate(info_page_path)
+
+        # Insert the info pages directly at the beginning
+        self.output_pdf.insert_pdf(template, start_at=0)
 
-        info_pdf.close()
         self.info_page_added = True
+        self.info_page_count += template.page_count
 
         return self
 
+    def removeInfoPage(self) -> "PDF_Tool":
+        if self.info_page_count:
+            self.output_pdf.delete_pages(0, self.info_page_count - 1)
+        self.info_page_added = False
+        self.info_page_count = 0
+        return self
+
+    def __buildKey(self, source) -> "tuple | None":
+        # In-memory inputs may change without notice, they get no key
+        if not isinstance(source, (str, os.PathLike)):
+            return None
+        return (
+            os.path.abspath(source),
+            os.path.getmtime(source),
+            self.additional_margin_pts,
+            self.frame_mode,
+        )
+
+    def needsRebuild(self, source) -> bool:
+        """True unless output_pdf holds the margin pages for this input and margin.
+
+        Only the additional margin and the input change the base pages, all
+        other settings can be applied with updateAnnotations. Vector frames
+        are part of the page content, so they always need a rebuild, and so
+        do in-memory inputs.
+        """
+        if self.frame_mode is self.FrameMode.VECTOR:
+            return True
+        if self.built_for is None or self.output_pdf.is_closed:
+            return True
+        try:
+            return self.built_for != self.__buildKey(source)
+        except OSError:
+            return True
+
     def convertMilimetersToPoints(self, value: float) -> float:
         return value * 2.83
 
+    @_timed_stage(_output_pages)
     def addPages(self) -> "PDF_Tool":
         for page in self.original_pdf:
             new_page = self.output_pdf.new_page(
@@ -106,85 +462,669 @@ class PDF_Tool:
             new_page.show_pdf_page(page.rect, self.original_pdf)
         return self
 
+    @_timed_stage(_output_pages)
     def addPagesWithMargin(self) -> "PDF_Tool":
-        for page in self.original_pdf:
+        return self.addPagesWithMarginAndAnnotations(
+            netto=False, bleed=False, safe_margin=False
+        )
+
+    @_timed_stage(_output_pages)
+    def addPagesWithMarginAndAnnotations(
+        self,
+        netto: bool = True,
+        bleed: bool = True,
+        safe_margin: bool = True,
+        from_page: int = 0,
+        to_page: int = -1,
+    ) -> "PDF_Tool":
+        # Single pass: build each page and draw its frames before moving on,
+        # instead of walking output_pdf again for every annotation type
+        vector = self.frame_mode is self.FrameMode.VECTOR
+        if vector and (netto or bleed or safe_margin):
+            frame_layer = self.__frameLayer(self.output_pdf)
+
+        page_count = self.original_pdf.page_count
+        if to_page < 0:
+            to_page = page_count - 1
+        for page in self.original_pdf.pages(from_page, to_page + 1):
+            if self.cancel_requested:
+                raise self.Cancelled("Processing cancelled")
+
             original_rect = page.rect
-            new_width = original_rect.width + (2 * self.additional_margin_pts)
-            new_height = original_rect.height + (2 * self.additional_margin_pts)
-
-            new_page = self.output_pdf.new_page(width=new_width, height=new_height)
-
-            new_page.show_pdf_page(
-                fitz.Rect(
-                    self.additional_margin_pts,
-                    self.additional_margin_pts,
-                    self.additional_margin_pts + original_rect.width,
-                    self.additional_margin_pts + original_rect.height,
-                ),
-                self.original_pdf,
-                page.number,
+            geometry = self.getPageGeometry(original_rect.width, original_rect.height)
+
+            new_page = self.output_pdf.new_page(
+                width=geometry.output_width, height=geometry.output_height
             )
 
+            new_page.show_pdf_page(geometry.placement, self.original_pdf, page.number)
+
+            frames = geometry.frames(netto, bleed, safe_margin)
+            if vector and frames:
+                self.__drawVectorFrames(new_page, frames, frame_layer)
+            else:
+                for rect, color in frames:
+                    self.__drawRectAnnotation(new_page, rect, color)
+
+            if self.progress_callback:
+                self.progress_callback(page.number + 1, page_count)
+
+        self.built_for = self.__buildKey(self.input_source)
         return self
 
-    def __addRectAnnotation(self, width, height, color: Color) -> "PDF_Tool":
-        react_size = (
-            self.convertMilimetersToPoints(width),
-            self.convertMilimetersToPoints(height),
+    @_timed_stage(_content_pages)
+    def updateAnnotations(
+        self, netto: bool = True, bleed: bool = True, safe_margin: bool = True
+    ) -> "PDF_Tool":
+        # Replace the frames on the already built pages with ones for the
+        # current settings. All annotations on these pages are frames, the
+        # source content is placed with show_pdf_page which does not copy any.
+        # Only for FrameMode.ANNOTATIONS, see needsRebuild.
+        #
+        # Frames depend on the page size only, so they are drawn on the first
+        # page of every size. The existing annotations of the other pages of
+        # that size are rewritten with its entries and share its appearance
+        # streams, which is far cheaper than add_rect_annot and update().
+        templates = {}
+        page_count = self.output_pdf.page_count - self.info_page_count
+        for i in range(self.info_page_count, self.output_pdf.page_count):
+            if self.cancel_requested:
+                raise self.Cancelled("Processing cancelled")
+
+            page = self.output_pdf[i]
+            size = (page.rect.width, page.rect.height)
+            template = templates.get(size)
+            if template is None:
+                for annot in list(page.annots()):
+                    page.delete_annot(annot)
+                geometry = self.__outputPageGeometry(page)
+                for rect, color in geometry.frames(netto, bleed, safe_margin):
+                    self.__drawRectAnnotation(page, rect, color)
+                templates[size] = [
+                    (self.__frameAnnotationBody(xref), name)
+                    for xref, _, name in page.annot_xrefs()
+                ]
+            else:
+                xrefs = [xref for xref, _, _ in page.annot_xrefs()]
+                # Other frame options need more or fewer annotations
+                resized = len(xrefs) != len(template)
+                while len(xrefs) < len(template):
+                    xrefs.append(self.output_pdf.get_new_xref())
+                for xref, (body, name) in zip(xrefs, template):
+                    self.output_pdf.update_object(
+                        xref,
+                        f"<<{body}/P {page.xref} 0 R/NM{fitz.get_pdf_str(name)}>>",
+                    )
+                if resized:
+                    annots = " ".join(f"{xref} 0 R" for xref in xrefs[: len(template)])
+                    self.output_pdf.xref_set_key(page.xref, "Annots", f"[{annots}]")
+
+            if self.progress_callback:
+                self.progress_callback(i - self.info_page_count + 1, page_count)
+
+        return self
+
+    def __frameAnnotationBody(self, xref: int) -> str:
+        """Dictionary entries of a frame annotation, without /P and /NM."""
+        body = ""
+        for key in self.FRAME_ANNOTATION_KEYS:
+            kind, value = self.output_pdf.xref_get_key(xref, key)
+            if kind != "null":
+                body += f"/{key} {value}"
+        return body
+
+    def getFrameRects(
+        self,
+        page_width: float,
+        page_height: float,
+        netto: bool = True,
+        bleed: bool = True,
+        safe_margin: bool = True,
+    ) -> List[Tuple[fitz.Rect, Color]]:
+        """Frame rectangles and colours as drawn on a page of the given size."""
+        margin = 2 * self.additional_margin_pts
+        return self.getPageGeometry(page_width - margin, page_height - margin).frames(
+            netto, bleed, safe_margin
         )
 
-        for i, page in enumerate(self.output_pdf):
-            if i == 0 and self.info_page_added:
-                continue
+    def getPageGeometry(self, page_width: float, page_height: float) -> PageGeometry:
+        """Output page size, placement and frames for a source page size.
 
-            rect = fitz.Rect(
-                (page.rect.width - react_size[0]) / 2,
-                (page.rect.height - react_size[1]) / 2,
-                (page.rect.width + react_size[0]) / 2,
-                (page.rect.height + react_size[1]) / 2,
+        Computed once per distinct size and reused for all pages and files
+        until a geometry setting changes.
+        """
+        key = (page_width, page_height)
+        geometry = self.page_geometries.get(key)
+        if geometry is None:
+            margin = self.additional_margin_pts
+            output_width = page_width + 2 * margin
+            output_height = page_height + 2 * margin
+            netto, bleed, safe_margin = (
+                self.__frameRect(output_width, output_height, width, height)
+                for width, height, _ in (
+                    self.__nettoFormatFrame(),
+                    self.__bleedSizeFrame(),
+                    self.__safeMarginSizeFrame(),
+                )
+            )
+            geometry = self.page_geometries[key] = self.PageGeometry(
+                output_width,
+                output_height,
+                fitz.Rect(margin, margin, margin + page_width, margin + page_height),
+                netto,
+                bleed,
+                safe_margin,
             )
-            annot = page.add_rect_annot(rect)
-            annot.set_colors(stroke=color.value)
-            annot.set_border(width=self.annotation_width)
-            annot.update()
+        return geometry
+
+    def __outputPageGeometry(self, page) -> PageGeometry:
+        margin = 2 * self.additional_margin_pts
+        return self.getPageGeometry(page.rect.width - margin, page.rect.height - margin)
+
+    def __frameRect(self, page_width, page_height, width, height) -> fitz.Rect:
+        return fitz.Rect(
+            (page_width - width) / 2,
+            (page_height - height) / 2,
+            (page_width + width) / 2,
+            (page_height + height) / 2,
+        )
+
+    def __drawRectAnnotation(self, page, rect: fitz.Rect, color: Color) -> None:
+        annot = page.add_rect_annot(rect)
+        annot.set_colors(stroke=color.value)
+        annot.set_border(width=self.annotation_width)
+        annot.update()
+
+    def __frameLayer(self, document: fitz.Document) -> int:
+        """xref of the frames optional content group, 0 without a layer."""
+        if not self.frame_layer:
+            return 0
+        for xref, ocg in document.get_ocgs().items():
+            if ocg["name"] == self.FRAME_LAYER_NAME:
+                return xref
+        return document.add_ocg(self.FRAME_LAYER_NAME, on=True)
+
+    def __mergeFrameLayer(self, document: fitz.Document, first_xref: int) -> None:
+        # insert_pdf copies the layer of a part as an unregistered OCG, point
+        # the frames of the inserted objects back to the document's layer
+        if self.frame_mode is not self.FrameMode.VECTOR or not self.frame_layer:
+            return
+        frame_layer = self.__frameLayer(document)
+        for xref in range(first_xref, document.xref_length()):
+            kind, value = document.xref_get_key(xref, "OC")
+            if kind != "xref":
+                continue
+            # Layers of the source artwork keep their own group
+            name = document.xref_get_key(int(value.split()[0]), "Name")
+            if name == ("string", self.FRAME_LAYER_NAME):
+                document.xref_set_key(xref, "OC", f"{frame_layer} 0 R")
+
+    def __drawVectorFrames(self, page, frames, frame_layer: int) -> None:
+        # Frames are drawn once per page size into a helper document;
+        # show_pdf_page then reuses its Form XObject for every output page.
+        # A helper is never changed after use, grafting relies on that.
+        size = (page.rect.width, page.rect.height)
+        key = (
+            tuple((tuple(rect), color) for rect, color in frames),
+            self.annotation_width,
+            size,
+        )
+        frames_pdf = self.frame_documents.get(key)
+        if frames_pdf is None:
+            frames_pdf = self.frame_documents[key] = fitz.open()
+            shape = frames_pdf.new_page(width=size[0], height=size[1]).new_shape()
+            for rect, color in frames:
+                shape.draw_rect(rect)
+                shape.finish(color=color.value, width=self.annotation_width)
+            shape.commit()
+
+        page.show_pdf_page(page.rect, frames_pdf, 0, oc=frame_layer)
+
+    def __addRectAnnotation(
+        self, netto: bool = False, bleed: bool = False, safe_margin: bool = False
+    ) -> "PDF_Tool":
+        for i, page in enumerate(self.output_pdf):
+            if i < self.info_page_count:
+                continue
+            frames = self.__outputPageGeometry(page).frames(netto, bleed, safe_margin)
+            for rect, color in frames:
+                self.__drawRectAnnotation(page, rect, color)
 
         return self
 
-    def addNettoFormatAnnotation(self) -> "PDF_Tool":
-        return self.__addRectAnnotation(
+    def __frame(self, width, height, color: Color) -> Tuple[float, float, Color]:
+        return (
+            self.convertMilimetersToPoints(width),
+            self.convertMilimetersToPoints(height),
+            color,
+        )
+
+    def __nettoFormatFrame(self) -> Tuple[float, float, Color]:
+        return self.__frame(
             self.netto_format[0],
             self.netto_format[1],
             self.Color.ORANGE,
         )
 
-    def addBleedSizeAnnotation(self) -> "PDF_Tool":
-        return self.__addRectAnnotation(
+    def __bleedSizeFrame(self) -> Tuple[float, float, Color]:
+        return self.__frame(
             self.netto_format[0] + (2 * self.bleed_size),
             self.netto_format[1] + (2 * self.bleed_size),
             self.Color.PINK,
         )
 
-    def addSafeMarginSizeAnnotation(self) -> "PDF_Tool":
-        return self.__addRectAnnotation(
+    def __safeMarginSizeFrame(self) -> Tuple[float, float, Color]:
+        return self.__frame(
             self.netto_format[0] - (2 * self.safe_margin_size),
             self.netto_format[1] - (2 * self.safe_margin_size),
             self.Color.GREEN,
         )
 
-    def savePDF(self, output_pdf_path: str) -> "PDF_Tool":
-        self.output_pdf.save(output_pdf_path)
+    @_timed_stage(_content_pages)
+    def addNettoFormatAnnotation(self) -> "PDF_Tool":
+        return self.__addRectAnnotation(netto=True)
+
+    @_timed_stage(_content_pages)
+    def addBleedSizeAnnotation(self) -> "PDF_Tool":
+        return self.__addRectAnnotation(bleed=True)
+
+    @_timed_stage(_content_pages)
+    def addSafeMarginSizeAnnotation(self) -> "PDF_Tool":
+        return self.__addRectAnnotation(safe_margin=True)
+
+    @_timed_stage(_output_pages)
+    def deduplicateResources(self) -> "PDF_Tool":
+        # Find streams (fonts, images, Form XObjects, ...) with identical
+        # definition and content; savePDF then merges them with garbage=4
+        seen = set()
+        duplicates = 0
+        duplicate_bytes = 0
+        for xref in range(1, self.output_pdf.xref_length()):
+            if not self.output_pdf.xref_is_stream(xref):
+                continue
+            stream = self.output_pdf.xref_stream_raw(xref)
+            digest = hashlib.sha1(
+                self.output_pdf.xref_object(xref, compressed=True).encode() + stream
+            ).digest()
+            if digest in seen:
+                duplicates += 1
+                duplicate_bytes += len(stream)
+            else:
+                seen.add(digest)
+
+        self.deduplicate_resources = True
+        # Only the raw stream data; savePDF measures what the merge saves
+        print(
+            f"Found {duplicates} duplicate streams "
+            f"({duplicate_bytes} bytes of stream data)."
+        )
         return self
 
-    def fullProcess(self, input_pdf_path: str, output_pdf_path: str) -> "PDF_Tool":
-        return (
-            self.loadPDF(input_pdf_path)
-            .addInfoPage()
-            .addPagesWithMargin()
-            .addNettoFormatAnnotation()
-            .addBleedSizeAnnotation()
-            .addSafeMarginSizeAnnotation()
-            .savePDF(output_pdf_path)
+    @_timed_stage(lambda tool: len(tool.preflight_results))
+    def runPreflight(self) -> "PDF_Tool":
+        """Check every page of the loaded input against the current frames.
+
+        Uses the bounding boxes of get_bboxlog: content inside the netto
+        format has to stay within the safe margin, and artwork reaching an
+        edge of the netto format has to extend to the bleed on that side.
+        The boxes are read once per input file, so checks with other frame
+        settings only repeat the comparisons.
+        """
+        self.preflight_results = [
+            self.__preflightPage(number, *page)
+            for number, page in enumerate(self.__preflightPages())
+        ]
+        failed = sum(not result.passed for result in self.preflight_results)
+        print(f"Preflight: {failed} of {len(self.preflight_results)} page(s) failed.")
+        return self
+
+    def __preflightPages(self) -> list:
+        # (width, height, content union, boxes) per page, boxes are
+        # (is text, x0, y0, x1, y1) in source page coordinates
+        key = None
+        if self.input_pdf_path:
+            try:
+                stat = os.stat(self.input_pdf_path)
+                path = os.path.abspath(self.input_pdf_path)
+                key = (path, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+        pages = _preflight_pages.get(key) if key else None
+        if pages is not None:
+            return pages
+
+        pages = []
+        page_count = self.original_pdf.page_count
+        for page in self.original_pdf:
+            if self.cancel_requested:
+                raise self.Cancelled("Preflight cancelled")
+            # Clip and invisible ("ignore-text") entries do not paint anything
+            boxes = [
+                (kind.endswith("-text"), *bbox)
+                for kind, bbox in page.get_bboxlog()
+                if kind.startswith(("fill-", "stroke-"))
+                and bbox[2] > bbox[0]
+                and bbox[3] > bbox[1]
+            ]
+            content = None
+            if boxes:
+                _, x0s, y0s, x1s, y1s = zip(*boxes)
+                content = (min(x0s), min(y0s), max(x1s), max(y1s))
+            pages.append((page.rect.width, page.rect.height, content, boxes))
+            if self.progress_callback:
+                self.progress_callback(page.number + 1, page_count)
+
+        if key:
+            _preflight_pages[key] = pages
+            while len(_preflight_pages) > PREFLIGHT_CACHE_ENTRIES:
+                del _preflight_pages[next(iter(_preflight_pages))]
+        return pages
+
+    def __preflightPage(
+        self, number: int, width: float, height: float, content, boxes
+    ) -> PreflightResult:
+        if content is None:
+            return self.PreflightResult(number, 0, ())
+        geometry = self.getPageGeometry(width, height)
+        tolerance = self.PREFLIGHT_TOLERANCE
+        # Frames are in output page coordinates, the source page sits at placement
+        dx, dy = geometry.placement.x0, geometry.placement.y0
+        sx0, sy0, sx1, sy1 = (
+            geometry.safe_margin.x0 - dx - tolerance,
+            geometry.safe_margin.y0 - dy - tolerance,
+            geometry.safe_margin.x1 - dx + tolerance,
+            geometry.safe_margin.y1 - dy + tolerance,
         )
+        x0, y0, x1, y1 = content
+        if x0 >= sx0 and y0 >= sy0 and x1 <= sx1 and y1 <= sy1:
+            return self.PreflightResult(number, 0, ())
+
+        nx0, ny0, nx1, ny1 = (
+            geometry.netto.x0 - dx + tolerance,
+            geometry.netto.y0 - dy + tolerance,
+            geometry.netto.x1 - dx - tolerance,
+            geometry.netto.y1 - dy - tolerance,
+        )
+        bx0, by0, bx1, by1 = (
+            geometry.bleed.x0 - dx + tolerance,
+            geometry.bleed.y0 - dy + tolerance,
+            geometry.bleed.x1 - dx - tolerance,
+            geometry.bleed.y1 - dy - tolerance,
+        )
+        outside_safe = 0
+        # Extents of the artwork reaching each netto edge
+        lefts, tops, rights, bottoms = [], [], [], []
+        for text, x0, y0, x1, y1 in boxes:
+            if x0 >= sx0 and y0 >= sy0 and x1 <= sx1 and y1 <= sy1:
+                continue
+            if text or (x0 > nx0 and y0 > ny0 and x1 < nx1 and y1 < ny1):
+                outside_safe += 1
+                continue
+            if x0 <= nx0:
+                lefts.append(x0)
+            if y0 <= ny0:
+                tops.append(y0)
+            if x1 >= nx1:
+                rights.append(x1)
+            if y1 >= ny1:
+                bottoms.append(y1)
+
+        short_bleed = tuple(
+            side
+            for side, short in (
+                ("left", lefts and min(lefts) > bx0),
+                ("top", tops and min(tops) > by0),
+                ("right", rights and max(rights) < bx1),
+                ("bottom", bottoms and max(bottoms) < by1),
+            )
+            if short
+        )
+        return self.PreflightResult(number, outside_safe, short_bleed)
+
+    @staticmethod
+    def saveDocument(
+        document: fitz.Document,
+        target,
+        profile: "PDF_Tool.SaveProfile",
+        min_garbage: int = 0,
+    ) -> Tuple[float, int]:
+        """Save with the options of a profile, returns (seconds, size).
+
+        target is a path, an io.BytesIO or any object with a write method
+        (an open file, a pipe, a socket file, ...).
+        """
+        options = dict(profile.value)
+        options["garbage"] = max(options.get("garbage", 0), min_garbage)
+
+        def write(options) -> int:
+            if isinstance(target, (str, os.PathLike)):
+                document.save(target, **options)
+                return os.path.getsize(target)
+            if isinstance(target, io.BytesIO):
+                start = target.tell()
+                document.save(target, **options)
+                return target.tell() - start
+            # fitz would reopen files by their name, write the bytes instead
+            data = document.tobytes(**options)
+            target.write(data)
+            return len(data)
+
+        start = time.perf_counter()
+        try:
+            size = write(options)
+        except Exception as e:
+            if not options.get("linear"):
+                raise
+            # Newer MuPDF builds dropped linearisation support
+            print(f"Linearisation unavailable ({e}), saving without it.")
+            options.pop("linear")
+            size = write(options)
+        elapsed = time.perf_counter() - start
+
+        return elapsed, size
+
+    @_timed_stage(_output_pages)
+    def savePDF(self, target) -> "PDF_Tool":
+        """Save output_pdf to a path or file-like object, see saveDocument.
+
+        After deduplicateResources the output is also written to memory with
+        the plain profile, deduplicated_bytes is the difference in size.
+        """
+        if self.deduplicate_resources:
+            _, plain_size = self.saveDocument(
+                self.output_pdf, io.BytesIO(), self.save_profile
+            )
+        self.save_time, self.save_size = self.saveDocument(
+            self.output_pdf,
+            target,
+            self.save_profile,
+            min_garbage=4 if self.deduplicate_resources else 0,
+        )
+        if not isinstance(target, (str, os.PathLike)):
+            target = type(target).__name__
+        print(
+            f"Saved PDF ({self.save_profile.name.lower()}): {target}, "
+            f"{self.save_size} bytes in {self.save_time:.2f}s"
+        )
+        if self.deduplicate_resources:
+            self.deduplicated_bytes = plain_size - self.save_size
+            print(f"Deduplication saved {self.deduplicated_bytes} bytes.")
+        return self
+
+    def streamProcess(
+        self,
+        source,
+        output_pdf_path: str,
+        chunk_size: int = 100,
+        netto: bool = True,
+        bleed: bool = True,
+        safe_margin: bool = True,
+        info_page: bool = True,
+    ) -> "PDF_Tool":
+        """Process the input in chunks of pages, appending each to the output file.
+
+        Only one chunk is held in memory at a time: the first chunk (with the
+        info page) is saved with the save profile, every following chunk is
+        appended with an incremental save. Peak memory is bounded by the chunk
+        size instead of the document size. The input may be in memory (see
+        loadPDF), the output has to be a path.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+        self.loadPDF(source)
+        source = self.input_source
+        page_count = self.original_pdf.page_count
+        chunk_count = max(1, -(-page_count // chunk_size))
+
+        for chunk, from_page in enumerate(range(0, max(page_count, 1), chunk_size)):
+            to_page = min(from_page + chunk_size, page_count) - 1
+            if chunk > 0:
+                # Reopen both documents so objects parsed for earlier chunks are released
+                self.output_pdf.close()
+                self.original_pdf.close()
+                self.original_pdf = self.__openInput(source)
+                self.output_pdf = fitz.open()
+                self.info_page_count = 0
+                self.info_page_added = False
+
+            if page_count:
+                self.addPagesWithMarginAndAnnotations(
+                    netto, bleed, safe_margin, from_page=from_page, to_page=to_page
+                )
+            if chunk == 0:
+                if info_page:
+                    self.addInfoPage()
+                self.savePDF(output_pdf_path)
+            else:
+                output = fitz.open(output_pdf_path)
+                first_xref = output.xref_length()
+                output.insert_pdf(self.output_pdf)
+                self.__mergeFrameLayer(output, first_xref)
+                output.saveIncr()
+                output.close()
+
+            peak_rss = get_peak_rss()
+            print(
+                f"Chunk {chunk + 1}/{chunk_count}: pages {from_page + 1}-{to_page + 1}"
+                + (f", peak RSS {peak_rss / 2**20:.1f} MB" if peak_rss else "")
+            )
+
+        self.peak_rss = get_peak_rss()
+        return self
+
+    def parallelProcess(
+        self,
+        source,
+        target,
+        workers: int = 0,
+        netto: bool = True,
+        bleed: bool = True,
+        safe_margin: bool = True,
+        info_page: bool = True,
+    ) -> "PDF_Tool":
+        """Build page ranges of one input on a process pool and merge them in order.
+
+        Every worker opens the input itself (fitz documents cannot be shared
+        between processes) and returns its part as PDF bytes. An in-memory
+        input is sent to every worker as bytes.
+        """
+        self.loadPDF(source)
+        source = self.input_source
+        if not self.input_pdf_path:
+            source = bytes(self.input_view if self.input_view is not None else source)
+        page_count = self.original_pdf.page_count
+        workers = max(1, min(workers or os.cpu_count() or 1, page_count))
+        step = -(-page_count // workers) if page_count else 1
+        jobs = [
+            (
+                self.getSettings(),
+                source,
+                from_page,
+                min(from_page + step, page_count) - 1,
+                (netto, bleed, safe_margin),
+                (self.frame_mode.name, self.frame_layer),
+            )
+            for from_page in range(0, page_count, step)
+        ]
+
+        with multiprocessing.Pool(workers) as pool:
+            # imap keeps the results in page order
+            for part_bytes in pool.imap(_build_page_range, jobs):
+                with fitz.open("pdf", part_bytes) as part:
+                    first_xref = self.output_pdf.xref_length()
+                    self.output_pdf.insert_pdf(part)
+                    self.__mergeFrameLayer(self.output_pdf, first_xref)
+                if self.progress_callback:
+                    self.progress_callback(self.output_pdf.page_count, page_count)
+
+        if info_page:
+            self.addInfoPage()
+        return self.savePDF(target)
+
+    def getTimingsTable(self) -> str:
+        """Per-stage summary, stages that ran several times are added up."""
+        totals = {}
+        for timing in self.timings:
+            total = totals.setdefault(timing.stage, [0.0, 0.0, 0, 0, None])
+            total[0] += timing.wall_time
+            total[1] += timing.cpu_time
+            total[2] += timing.pages
+            total[3] = max(total[3], timing.process_peak_rss or 0)
+            if timing.traced_peak is not None:
+                total[4] = max(total[4] or 0, timing.traced_peak)
+
+        # "process peak" is the high-water mark so far, it includes earlier
+        # stages and files; "traced" is per stage and needs enableProfiling
+        lines = [
+            f"{'stage':<34}{'wall s':>8}{'cpu s':>8}{'pages':>7}"
+            f"{'process peak MB':>17}{'traced MB':>11}"
+        ]
+        for stage, (wall, cpu, pages, process_peak, traced) in totals.items():
+            traced_mb = f"{traced / 2**20:.1f}" if traced is not None else "-"
+            lines.append(
+                f"{stage:<34}{wall:>8.3f}{cpu:>8.3f}{pages:>7}"
+                f"{process_peak / 2**20:>17.1f}{traced_mb:>11}"
+            )
+        wall = sum(timing.wall_time for timing in self.timings)
+        lines.append(f"{'total':<34}{wall:>8.3f}")
+        return "\n".join(lines)
+
+    def getTimingsJSONLines(self, **extra) -> str:
+        """One JSON object per stage, extra keys (e.g. file=...) are added to each."""
+        return "".join(
+            json.dumps({**extra, **asdict(timing)}) + "\n" for timing in self.timings
+        )
+
+    def enableProfiling(self, profile_path: str) -> "PDF_Tool":
+        # cProfile covers the timed stages, tracemalloc the Python allocations
+        self.profile_path = profile_path
+        self.profiler = cProfile.Profile()
+        tracemalloc.start()
+        return self
+
+    def dumpProfile(self) -> "PDF_Tool":
+        """Write <path> (pstats) and <path>.tracemalloc.txt and stop profiling."""
+        if not self.profiler:
+            return self
+        self.profiler.dump_stats(self.profile_path)
+        snapshot = tracemalloc.take_snapshot()
+        # The stages reset the tracemalloc peak, so take the largest of theirs
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max([peak] + [timing.traced_peak or 0 for timing in self.timings])
+        tracemalloc.stop()
+        with open(self.profile_path + ".tracemalloc.txt", "w") as file:
+            file.write(f"Peak traced Python memory: {peak} bytes\n\n")
+            for stat in snapshot.statistics("lineno")[:50]:
+                file.write(f"{stat}\n")
+        self.profiler = None
+        print(f"Profile written to: {self.profile_path}")
+        return self
+
+    def fullProcess(self, source, target, deduplicate: bool = False) -> "PDF_Tool":
+        self.loadPDF(source).addPagesWithMarginAndAnnotations().addInfoPage()
+        if deduplicate:
+            self.deduplicateResources()
+        return self.savePDF(target)
 
     def close(self, keep_output=False) -> None:
         closed_any = False
@@ -195,5 +1135,17 @@ class PDF_Tool:
             if hasattr(self, "output_pdf") and not self.output_pdf.is_closed:
                 self.output_pdf.close()
                 closed_any = True
+        self.__releaseInputView()
         if closed_any:
             print("PDF files closed.")
+
+
+def _build_page_range(job) -> bytes:
+    """Pool worker for PDF_Tool.parallelProcess."""
+    settings, source, from_page, to_page, frames, frame_mode = job
+    tool = PDF_Tool().applySettings(settings).setFrameMode(*frame_mode)
+    tool.loadPDF(source)
+    tool.addPagesWithMarginAndAnnotations(*frames, from_page=from_page, to_page=to_page)
+    part_bytes = tool.output_pdf.tobytes()
+    tool.close()
+    return part_bytes
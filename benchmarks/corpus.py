@@ -0,0 +1,105 @@
+"""Deterministic synthetic PDF corpus generated with reportlab.
+
+Usage: python -m benchmarks.corpus [directory] [--scale N]
+"""
+
+import os
+import sys
+import random
+import argparse
+from PIL import Image
+from reportlab.lib.pagesizes import A3, A4, A5, letter
+from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from PDF_Tool import PDF_Tool
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(__file__), ".corpus")
+WORDS = ("lorem", "ipsum", "dolor", "sit", "amet", "bleed", "margin", "netto")
+
+# name: (pages, page sizes (cycled), vector shapes per page, image side in px, images per page)
+CORPUS = {
+    "text_a4": (50, [A4], 20, 0, 0),
+    "vector_a3": (20, [A3], 2000, 0, 0),
+    "images_a4": (20, [A4], 10, 600, 1),
+    "mixed_sizes": (40, [A4, A5, letter, A3], 100, 300, 1),
+    "poster": (2, [(600 * mm, 900 * mm)], 5000, 1600, 1),
+}
+
+
+def new_tool() -> PDF_Tool:
+    """PDF_Tool with the settings every benchmark uses."""
+    return (
+        PDF_Tool()
+        .setNettoFormat(100, 100)
+        .setBleedSize(3)
+        .setSafeMarginSize(4)
+        .setAdditionalMargin(5)
+    )
+
+
+def make_image(rng: random.Random, side: int) -> Image.Image:
+    # Noise over a gradient compresses badly, like photographs do
+    gradient = Image.linear_gradient("L").resize((side, side)).convert("RGB")
+    noise = Image.frombytes("RGB", (side, side), rng.randbytes(side * side * 3))
+    return Image.blend(gradient, noise, 0.5)
+
+
+def generate_pdf(path: str, spec: tuple, seed: int) -> None:
+    pages, sizes, shapes, image_side, images = spec
+    rng = random.Random(seed)
+    pdf = canvas.Canvas(path)
+    for number in range(pages):
+        width, height = sizes[number % len(sizes)]
+        pdf.setPageSize((width, height))
+        for _ in range(shapes):
+            pdf.setStrokeColorRGB(rng.random(), rng.random(), rng.random())
+            pdf.setFillColorRGB(rng.random(), rng.random(), rng.random())
+            x, y = rng.uniform(0, width), rng.uniform(0, height)
+            pdf.rect(
+                x, y, rng.uniform(2, width / 4), rng.uniform(2, height / 4), fill=1
+            )
+        for _ in range(images):
+            image = ImageReader(make_image(rng, image_side))
+            side = min(width, height) / 2
+            x, y = rng.uniform(0, width - side), rng.uniform(0, height - side)
+            pdf.drawImage(image, x, y, side, side)
+        pdf.setFillColorRGB(0, 0, 0)
+        pdf.setFont("Helvetica", 24)
+        pdf.drawString(36, height - 60, f"Benchmark page {number + 1} of {pages}")
+        pdf.setFont("Helvetica", 10)
+        for line in range(20):
+            words = [rng.choice(WORDS) for _ in range(12)]
+            pdf.drawString(36, height - 100 - line * 14, " ".join(words))
+        pdf.showPage()
+    pdf.save()
+
+
+def generate_corpus(
+    directory: str = DEFAULT_DIRECTORY, scale: int = 1, names=None
+) -> dict:
+    """Generate missing corpus files, returns {name: path}.
+
+    Files are deterministic for a given scale, so existing ones are reused.
+    names limits the corpus to these entries.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = {}
+    for seed, (name, spec) in enumerate(sorted(CORPUS.items())):
+        if names and name not in names:
+            continue
+        pages, *rest = spec
+        path = os.path.join(directory, f"{name}_x{scale}.pdf")
+        if not os.path.exists(path):
+            generate_pdf(path, (pages * scale, *rest), seed)
+        paths[name] = path
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", nargs="?", default=DEFAULT_DIRECTORY)
+    parser.add_argument("--scale", type=int, default=1, help="Page count multiplier")
+    args = parser.parse_args(sys.argv[1:])
+    for name, path in generate_corpus(args.directory, args.scale).items():
+        print(f"{name:<14}{os.path.getsize(path) / 2**20:>8.1f} MB  {path}")
@@ -0,0 +1,77 @@
+"""Build time, write time and output size of annotation vs vector frames.
+
+Usage: python -m benchmarks.frame_modes [input.pdf] [--scale 10] [--profile fast]
+
+Without an input the text_a4 corpus file at --scale is used; its pages are
+light, so the frames make up most of the output.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import fitz
+from PDF_Tool import PDF_Tool
+from benchmarks.corpus import DEFAULT_DIRECTORY, generate_corpus, new_tool
+
+MODES = (
+    ("annotations", PDF_Tool.FrameMode.ANNOTATIONS, False),
+    ("vector", PDF_Tool.FrameMode.VECTOR, False),
+    ("vector + layer", PDF_Tool.FrameMode.VECTOR, True),
+)
+
+
+def measure(
+    input_pdf_path: str, output_pdf_path: str, mode, layer: bool, profile: str
+) -> tuple:
+    """Returns (pages, build seconds, write seconds, size, object count)."""
+    tool = new_tool().setFrameMode(mode, layer).setSaveProfile(profile)
+    tool.loadPDF(input_pdf_path)
+    start = time.perf_counter()
+    tool.addPagesWithMarginAndAnnotations()
+    build = time.perf_counter() - start
+    tool.savePDF(output_pdf_path)
+    pages = tool.output_pdf.page_count
+    tool.close()
+    with fitz.open(output_pdf_path) as output:
+        objects = output.xref_length() - 1
+    return pages, build, tool.save_time, tool.save_size, objects
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input", nargs="?", help="PDF to process")
+    parser.add_argument("--scale", type=int, default=10, help="Corpus page multiplier")
+    parser.add_argument(
+        "--profile",
+        choices=[profile.name.lower() for profile in PDF_Tool.SaveProfile],
+        default="fast",
+    )
+    args = parser.parse_args(argv)
+    path = args.input
+    if not path:
+        path = generate_corpus(DEFAULT_DIRECTORY, args.scale, ["text_a4"])["text_a4"]
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "output.pdf")
+        for name, mode, layer in MODES:
+            results.append((name, *measure(path, output, mode, layer, args.profile)))
+
+    print(f"\n{os.path.basename(path)}, save profile {args.profile}")
+    print(
+        f"{'mode':<16}{'pages':>7}{'build s':>9}{'write s':>9}{'size MB':>9}{'objects':>9}"
+    )
+    for name, pages, build, write, size, objects in results:
+        print(
+            f"{name:<16}{pages:>7}{build:>9.2f}{write:>9.2f}"
+            f"{size / 2**20:>9.2f}{objects:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,80 @@
+"""Check the import time of the GUI entry point against a budget.
+
+Usage: python -m benchmarks.import_budget [--budget-ms 100] [--repeat 5]
+
+Imports main in fresh interpreters with -X importtime and exits with 1 when
+the median cumulative import time exceeds the budget, or when a backend that
+should be imported lazily (PyMuPDF, Pillow, PDF_Tool, the modules only the
+result cache needs) is imported at startup. tests/test_import_budget.py runs
+the same checks.
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULE = "main"
+LAZY_MODULES = (
+    "fitz",
+    "pymupdf",
+    "PIL",
+    "PDF_Tool",
+    "tempfile",
+    "shutil",
+    "hashlib",
+)
+BUDGET_MS = 100.0
+
+
+def measure_imports(module: str) -> dict:
+    """Returns {imported module: cumulative microseconds} for one cold import."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imports = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imports[name.strip()] = int(cumulative)
+    return imports
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [measure_imports(MODULE) for _ in range(args.repeat)]
+    total_ms = statistics.median(run[MODULE] for run in runs) / 1000
+    print(f"import {MODULE}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[1:6]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    eager = sorted({name.split(".")[0] for name in runs[-1]}.intersection(LAZY_MODULES))
+    if eager:
+        print(f"Imported at startup, should be lazy: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print("Import time above budget")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,69 @@
+"""Per-document cost of addInfoPage: reopening raport.pdf vs the cached template.
+
+Usage: python -m benchmarks.info_page [--documents N] [--pages N]
+"""
+
+import sys
+import time
+import argparse
+import fitz
+from PDF_Tool import PDF_Tool, get_resource_path
+
+
+def add_info_page_reopen(output_pdf: fitz.Document) -> None:
+    # The previous addInfoPage: open, append, then move to the front
+    info_pdf = fitz.open(get_resource_path("raport.pdf"))
+    for i in range(info_pdf.page_count):
+        info_page = info_pdf[i]
+        new_page = output_pdf.new_page(
+            -1, width=info_page.rect.width, height=info_page.rect.height
+        )
+        new_page.show_pdf_page(new_page.rect, info_pdf, i)
+    page_count = output_pdf.page_count
+    for i in range(info_pdf.page_count):
+        output_pdf.move_page(page_count - 1 - i, 0)
+    info_pdf.close()
+
+
+def add_info_page_template(output_pdf: fitz.Document) -> None:
+    tool = PDF_Tool()
+    tool.output_pdf = output_pdf
+    tool.addInfoPage()
+    del tool.output_pdf
+
+
+def make_output(pages: int) -> fitz.Document:
+    doc = fitz.open()
+    for _ in range(pages):
+        doc.new_page()
+    return doc
+
+
+def measure(function, documents: int, pages: int) -> float:
+    outputs = [make_output(pages) for _ in range(documents)]
+    start = time.perf_counter()
+    for output in outputs:
+        function(output)
+    elapsed = time.perf_counter() - start
+    for output in outputs:
+        output.close()
+    return elapsed / documents
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=500)
+    parser.add_argument("--pages", type=int, default=50, help="Pages per output")
+    args = parser.parse_args(argv)
+
+    # Load the template outside of the measurement, as a batch worker would
+    PDF_Tool.getInfoPageTemplate()
+    before = measure(add_info_page_reopen, args.documents, args.pages)
+    after = measure(add_info_page_template, args.documents, args.pages)
+    print(f"reopen + move_page: {before * 1e6:8.1f} us per document")
+    print(f"cached template:    {after * 1e6:8.1f} us per document")
+    print(f"speedup:            {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,169 @@
+"""Sustained jobs/s and latency percentiles of pdf_tool_server.
+
+Usage:
+    python -m benchmarks.load_test --spawn [--workers 4] [--concurrency 8]
+    python -m benchmarks.load_test --port 8765 [input.pdf] [--duration 30]
+
+--spawn starts a server on a temporary Unix socket for the run; otherwise
+a running server is used (--host/--port or --unix). Without an input the
+text_a4 corpus file is uploaded.
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pdf_tool_server import percentile
+from benchmarks.corpus import DEFAULT_DIRECTORY, generate_corpus
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def request(address, method: str, target: str, body: bytes = b"") -> tuple:
+    """One HTTP request per connection, returns (status, headers, body)."""
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    head = f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+    head += f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n"
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        chunks = []
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            chunks.append(chunk[:-2])
+        data = b"".join(chunks)
+    else:
+        data = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return status, headers, data
+
+
+async def client(address, target: str, body: bytes, deadline: float, results: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            status, _, _ = await request(address, "POST", target, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            status = None
+        results.append((status, time.perf_counter() - start))
+        if status != 200:
+            # Queue full or server error, back off instead of spinning
+            await asyncio.sleep(0.05)
+
+
+async def wait_for_server(address, timeout: float = 30) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            await request(address, "GET", "/stats")
+            return
+        except (ConnectionError, FileNotFoundError):
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run(args, address) -> None:
+    with open(args.input, "rb") as file:
+        body = file.read()
+    target = "/jobs?" + args.query if args.query else "/jobs"
+    await wait_for_server(address)
+
+    # Warm up every worker once so process start-up is not measured
+    await asyncio.gather(
+        *(request(address, "POST", target, body) for _ in range(args.concurrency))
+    )
+
+    results = []
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(
+        *(
+            client(address, target, body, deadline, results)
+            for _ in range(args.concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    _, _, stats = await request(address, "GET", "/stats")
+
+    latencies = [seconds for status, seconds in results if status == 200]
+    errors = len(results) - len(latencies)
+    print(f"{os.path.basename(args.input)}: {len(body) / 2**20:.2f} MB per job")
+    print(f"concurrency {args.concurrency}, {elapsed:.1f}s")
+    print(f"jobs:      {len(latencies)} ok, {errors} failed")
+    print(f"jobs/s:    {len(latencies) / elapsed:.2f}")
+    if latencies:
+        for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+            print(f"{name}:       {percentile(latencies, fraction) * 1000:.1f} ms")
+    print(f"server:    {json.loads(stats)}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input", nargs="?", help="PDF to upload")
+    parser.add_argument(
+        "--spawn", action="store_true", help="Start a server for the run"
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="PATH")
+    parser.add_argument("--concurrency", type=int, default=8, help="Parallel clients")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds")
+    parser.add_argument("--query", default="", help="Job settings, e.g. bleed=2")
+    args = parser.parse_args(argv)
+    if not args.input:
+        args.input = generate_corpus(DEFAULT_DIRECTORY, 1, ["text_a4"])["text_a4"]
+
+    if not args.spawn:
+        address = args.unix or (args.host, args.port)
+        asyncio.run(run(args, address))
+        return 0
+
+    with tempfile.TemporaryDirectory() as directory:
+        address = os.path.join(directory, "server.sock")
+        server = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.join(ROOT, "pdf_tool_server.py"),
+                "--unix",
+                address,
+                "--workers",
+                str(args.workers),
+            ],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            asyncio.run(run(args, address))
+        finally:
+            server.terminate()
+            server.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,42 @@
+"""Pages/s of PDF_Tool.parallelProcess for a growing number of page workers.
+
+Usage: python -m benchmarks.parallel_scaling input.pdf [--workers 1 2 4 8]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from benchmarks.corpus import new_tool
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="PDF to process, ideally several hundred pages")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "output.pdf")
+        for workers in args.workers:
+            tool = new_tool()
+            start = time.perf_counter()
+            tool.parallelProcess(args.input, output, workers=workers)
+            elapsed = time.perf_counter() - start
+            results.append((workers, tool.original_pdf.page_count, elapsed))
+            tool.close()
+
+    print(f"\n{os.cpu_count()} CPU(s) available")
+    print(f"{'workers':>8}{'pages':>8}{'seconds':>10}{'pages/s':>10}{'speedup':>10}")
+    baseline = results[0][2]
+    for workers, pages, elapsed in results:
+        print(
+            f"{workers:>8}{pages:>8}{elapsed:>10.2f}{pages / elapsed:>10.1f}"
+            f"{baseline / elapsed:>9.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
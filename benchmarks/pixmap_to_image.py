@@ -0,0 +1,64 @@
+"""Compare the PPM round trip with the direct sample-buffer path for previews.
+
+Usage: python -m benchmarks.pixmap_to_image [input.pdf] [--repeat N]
+
+Without an input an empty A3 page with some vector content is used.
+"""
+
+import io
+import sys
+import time
+import argparse
+import fitz
+from PIL import Image
+from render_cache import pixmap_to_image
+
+ZOOMS = (1.0, 2.0, 3.0)
+
+
+def ppm_round_trip(pix) -> Image.Image:
+    # The path display_page used before
+    img = Image.open(io.BytesIO(pix.tobytes("ppm")))
+    img.load()
+    return img
+
+
+def make_a3_page() -> fitz.Document:
+    doc = fitz.open()
+    page = doc.new_page(width=842, height=1191)
+    for i in range(40):
+        page.draw_rect(fitz.Rect(20 + i * 10, 20 + i * 10, 800 - i * 5, 1150 - i * 5))
+    page.insert_text((72, 72), "A3 benchmark page", fontsize=36)
+    return doc
+
+
+def measure(function, pix, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(pix)
+    return (time.perf_counter() - start) / repeat
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="PDF whose first page is rendered")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    doc = fitz.open(args.input) if args.input else make_a3_page()
+    page = doc[0]
+    print(f"{'zoom':>6}{'pixels':>14}{'ppm ms':>10}{'direct ms':>12}{'speedup':>10}")
+    for zoom in ZOOMS:
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        assert ppm_round_trip(pix).tobytes() == pixmap_to_image(pix).tobytes()
+        ppm = measure(ppm_round_trip, pix, args.repeat)
+        direct = measure(pixmap_to_image, pix, args.repeat)
+        print(
+            f"{zoom:>6.1f}{pix.width * pix.height:>14}{ppm * 1000:>10.2f}"
+            f"{direct * 1000:>12.2f}{ppm / direct:>9.1f}x"
+        )
+    doc.close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,66 @@
+"""Preflight time per file compared with rendering every page once.
+
+Usage: python -m benchmarks.preflight [input.pdf ...] [--scale 10] [--zoom 1.0]
+
+"first" reads the content boxes, "settings" repeats the check with another
+bleed size on the cached boxes, "render" draws every page at --zoom like the
+GUI preview. Without inputs the corpus at --scale is used (text_a4 has 500
+pages at the default scale).
+"""
+
+import os
+import sys
+import time
+import argparse
+import fitz
+from benchmarks.corpus import DEFAULT_DIRECTORY, generate_corpus, new_tool
+
+
+def measure(path: str, zoom: float) -> tuple:
+    """Returns (pages, failed pages, first s, settings s, render s)."""
+    tool = new_tool()
+    tool.loadPDF(path)
+    start = time.perf_counter()
+    tool.runPreflight()
+    first = time.perf_counter() - start
+    failed = sum(not result.passed for result in tool.preflight_results)
+
+    start = time.perf_counter()
+    tool.setBleedSize(5).runPreflight()
+    settings = time.perf_counter() - start
+    pages = tool.original_pdf.page_count
+    tool.close()
+
+    start = time.perf_counter()
+    with fitz.open(path) as document:
+        for page in document:
+            page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+    render = time.perf_counter() - start
+    return pages, failed, first, settings, render
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("inputs", nargs="*", help="PDFs to check")
+    parser.add_argument("--scale", type=int, default=10, help="Corpus page multiplier")
+    parser.add_argument("--zoom", type=float, default=1.0, help="Render zoom")
+    args = parser.parse_args(argv)
+    paths = args.inputs or list(generate_corpus(DEFAULT_DIRECTORY, args.scale).values())
+
+    results = [(path, *measure(path, args.zoom)) for path in paths]
+    print(
+        f"\n{'file':<24}{'pages':>7}{'failed':>8}"
+        f"{'first s':>9}{'settings s':>12}{'render s':>10}"
+    )
+    for path, pages, failed, first, settings, render in results:
+        print(
+            f"{os.path.basename(path):<24}{pages:>7}{failed:>8}"
+            f"{first:>9.2f}{settings:>12.3f}{render:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,134 @@
+"""Benchmark PDF_Tool and the preview render path over the synthetic corpus.
+
+Usage:
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json [--threshold 0.15]
+
+Every case runs in a fresh process so peak RSS is per case. With --baseline
+the results are compared and the exit status is 1 if any metric regressed
+by more than the threshold.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+import fitz
+from PDF_Tool import get_peak_rss
+from render_cache import pixmap_to_image
+from benchmarks.corpus import DEFAULT_DIRECTORY, generate_corpus, new_tool
+
+RENDER_ZOOMS = (0.5, 1.0, 2.0)
+RENDER_PAGES = 10
+
+HIGHER_IS_BETTER = ("process_pages_per_s", "process_mb_per_s", "render_pages_per_s")
+LOWER_IS_BETTER = ("output_bytes", "peak_rss_bytes")
+
+
+def run_case(path: str) -> dict:
+    input_bytes = os.path.getsize(path)
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, "output.pdf")
+        tool = new_tool()
+        start = time.perf_counter()
+        tool.fullProcess(path, output)
+        process_seconds = time.perf_counter() - start
+        pages = tool.original_pdf.page_count
+        output_bytes = os.path.getsize(output)
+        tool.close()
+
+    with fitz.open(path) as doc:
+        rendered = 0
+        start = time.perf_counter()
+        for page in doc.pages(0, min(RENDER_PAGES, doc.page_count)):
+            for zoom in RENDER_ZOOMS:
+                pixmap_to_image(page.get_pixmap(matrix=fitz.Matrix(zoom, zoom)))
+                rendered += 1
+        render_seconds = time.perf_counter() - start
+
+    return {
+        "pages": pages,
+        "input_bytes": input_bytes,
+        "process_seconds": process_seconds,
+        "process_pages_per_s": pages / process_seconds,
+        "process_mb_per_s": input_bytes / 2**20 / process_seconds,
+        "output_bytes": output_bytes,
+        "render_pages_per_s": rendered / render_seconds,
+        "peak_rss_bytes": get_peak_rss(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for case, metrics in results.items():
+        base = baseline.get(case)
+        if not base:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            new, old = metrics.get(metric), base.get(metric)
+            if not new or not old:
+                continue
+            change = (new - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append((case, metric, old, new, change))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--corpus", default=DEFAULT_DIRECTORY)
+    parser.add_argument("--scale", type=int, default=1, help="Page count multiplier")
+    parser.add_argument("--cases", nargs="+", help="Only run these corpus entries")
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Compare against this results file")
+    parser.add_argument("--save-baseline", help="Write the results as new baseline")
+    parser.add_argument(
+        "--threshold", type=float, default=0.15, help="Allowed relative regression"
+    )
+    args = parser.parse_args(argv)
+
+    corpus = generate_corpus(args.corpus, args.scale, args.cases)
+    results = {}
+    for name, path in corpus.items():
+        # A fresh process per case keeps peak RSS meaningful
+        with multiprocessing.Pool(1) as pool:
+            results[name] = pool.apply(run_case, (path,))
+
+    print(
+        f"{'case':<14}{'pages':>6}{'pages/s':>9}{'MB/s':>8}{'render/s':>10}"
+        f"{'out MB':>8}{'RSS MB':>8}"
+    )
+    for name, metrics in results.items():
+        print(
+            f"{name:<14}{metrics['pages']:>6}{metrics['process_pages_per_s']:>9.1f}"
+            f"{metrics['process_mb_per_s']:>8.2f}{metrics['render_pages_per_s']:>10.1f}"
+            f"{metrics['output_bytes'] / 2**20:>8.2f}"
+            f"{(metrics['peak_rss_bytes'] or 0) / 2**20:>8.1f}"
+        )
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as file:
+                json.dump(results, file, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as file:
+        regressions = compare(results, json.load(file), args.threshold)
+    for case, metric, old, new, change in regressions:
+        print(f"REGRESSION {case} {metric}: {old:.4g} -> {new:.4g} ({change:+.0%})")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%}.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""Compare write latency and output size of the PDF_Tool save profiles.
+
+Usage: python -m benchmarks.save_profiles input.pdf [input2.pdf ...]
+"""
+
+import os
+import sys
+import tempfile
+from PDF_Tool import PDF_Tool
+from benchmarks.corpus import new_tool
+
+
+def main(paths) -> None:
+    for path in paths:
+        tool = new_tool().loadPDF(path).addPagesWithMarginAndAnnotations().addInfoPage()
+        print(f"\n{os.path.basename(path)} ({os.path.getsize(path)} bytes input)")
+        print(f"{'profile':<10}{'seconds':>10}{'bytes':>14}")
+        with tempfile.TemporaryDirectory() as directory:
+            for profile in PDF_Tool.SaveProfile:
+                output = os.path.join(directory, profile.name + ".pdf")
+                seconds, size = PDF_Tool.saveDocument(tool.output_pdf, output, profile)
+                print(f"{profile.name.lower():<10}{seconds:>10.3f}{size:>14}")
+        tool.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    main(sys.argv[1:])
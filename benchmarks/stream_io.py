@@ -0,0 +1,87 @@
+"""Per-job time and disk I/O of temp file round-trips vs in-memory streams.
+
+Usage: python -m benchmarks.stream_io [input.pdf] [--runs 20] [--tmp-dir DIR]
+
+Both variants start from the upload in memory and end with the result in
+memory, like a service job. The temp file variant writes the upload to
+--tmp-dir, processes path to path and reads the result back; the stream
+variant hands the bytes to loadPDF and saves into a BytesIO.
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+from benchmarks.corpus import DEFAULT_DIRECTORY, generate_corpus, new_tool
+
+
+def via_temp_files(input_bytes: bytes, directory: str) -> tuple:
+    """Returns (output bytes, bytes written to and read from disk)."""
+    input_path = os.path.join(directory, "input.pdf")
+    output_path = os.path.join(directory, "output.pdf")
+    with open(input_path, "wb") as file:
+        file.write(input_bytes)
+    tool = new_tool()
+    tool.loadPDF(input_path).addPagesWithMarginAndAnnotations().addInfoPage()
+    tool.savePDF(output_path)
+    tool.close()
+    with open(output_path, "rb") as file:
+        output_bytes = file.read()
+    os.remove(input_path)
+    os.remove(output_path)
+    return output_bytes, 2 * (len(input_bytes) + len(output_bytes))
+
+
+def via_streams(input_bytes: bytes, directory: str) -> tuple:
+    output = io.BytesIO()
+    tool = new_tool()
+    tool.loadPDF(input_bytes).addPagesWithMarginAndAnnotations().addInfoPage()
+    tool.savePDF(output)
+    tool.close()
+    return output.getvalue(), 0
+
+
+VARIANTS = (("temp files", via_temp_files), ("streams", via_streams))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("input", nargs="?", help="PDF to process")
+    parser.add_argument("--runs", type=int, default=20, help="Jobs per variant")
+    parser.add_argument("--tmp-dir", help="Directory for the temp files")
+    args = parser.parse_args(argv)
+    path = args.input
+    if not path:
+        path = generate_corpus(DEFAULT_DIRECTORY, 1, ["text_a4"])["text_a4"]
+    with open(path, "rb") as file:
+        input_bytes = file.read()
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as directory:
+        for name, variant in VARIANTS:
+            # One untimed job loads fonts and the info page template
+            variant(input_bytes, directory)
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                _, disk_bytes = variant(input_bytes, directory)
+            results.append(
+                (name, (time.perf_counter() - start) / args.runs, disk_bytes)
+            )
+
+    print(
+        f"\n{os.path.basename(path)}, {len(input_bytes) / 2**20:.2f} MB, {args.runs} runs"
+    )
+    print(f"{'variant':<12}{'ms/job':>9}{'disk MB/job':>13}")
+    for name, seconds, disk_bytes in results:
+        print(f"{name:<12}{seconds * 1000:>9.1f}{disk_bytes / 2**20:>13.2f}")
+    saved = results[0][2] - results[1][2]
+    print(f"Saved I/O per job: {saved / 2**20:.2f} MB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+
+import os
+import sys
+import glob
+import time
+import shutil
+import argparse
+import multiprocessing
+import fitz
+from PDF_Tool import PDF_Tool, get_peak_rss
+from result_cache import ResultCache, get_default_cache_dir
+
+# One PDF_Tool per worker process, created by the pool initializer
+_worker_tool = None
+_worker_options = None
+_worker_cache = None
+
+
+def collect_input_files(patterns, suffix: str) -> list:
+    """Expand input globs and directories into a sorted list of PDF files."""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, "*.pdf"))
+        else:
+            matches = glob.glob(pattern)
+        for path in matches:
+            # Skip results of a previous run lying next to the inputs
+            if os.path.isfile(path) and not path.endswith(suffix + ".pdf"):
+                files.append(os.path.abspath(path))
+    return sorted(set(files))
+
+
+def get_output_path(input_path: str, output_dir, suffix: str) -> str:
+    base, _ = os.path.splitext(os.path.basename(input_path))
+    directory = output_dir if output_dir else os.path.dirname(input_path)
+    return os.path.join(directory, base + suffix + ".pdf")
+
+
+def init_worker(settings: dict, options: dict) -> None:
+    global _worker_tool, _worker_options, _worker_cache
+    _worker_tool = (
+        PDF_Tool()
+        .applySettings(settings)
+        .setSaveProfile(options["save_profile"])
+        .setFrameMode(options["frame_mode"], options["frame_layer"])
+    )
+    _worker_options = options
+    if options["cache_dir"]:
+        _worker_cache = ResultCache(options["cache_dir"], options["cache_size"])
+
+
+def process_file(job) -> tuple:
+    """Run the pipeline for a single file.
+
+    Returns (input, output, pages, seconds, deduplicated bytes, stage timings
+    as JSON lines, served from the result cache, error).
+    """
+    input_path, output_path = job
+    tool = _worker_tool
+    if _worker_options["profile_dir"]:
+        name = os.path.splitext(os.path.basename(input_path))[0]
+        tool.enableProfiling(
+            os.path.join(_worker_options["profile_dir"], name + ".prof")
+        )
+    start = time.perf_counter()
+    try:
+        key = None
+        if _worker_cache:
+            key = _worker_cache.key(input_path, _worker_options["cache_settings"])
+            cached_path = _worker_cache.get(key)
+            if cached_path:
+                try:
+                    shutil.copyfile(cached_path, output_path)
+                except OSError as e:
+                    # Evicted by another process since get(), process it instead
+                    print(
+                        f"Warning: could not copy cached result for {input_path}: {e}",
+                        file=sys.stderr,
+                    )
+                else:
+                    with fitz.open(input_path) as document:
+                        pages = document.page_count
+                    elapsed = time.perf_counter() - start
+                    return input_path, output_path, pages, elapsed, 0, "", True, None
+
+        saved = 0
+        if _worker_options["page_workers"] > 1:
+            tool.parallelProcess(
+                input_path,
+                output_path,
+                workers=_worker_options["page_workers"],
+                netto=_worker_options["netto"],
+                bleed=_worker_options["bleed"],
+                safe_margin=_worker_options["safe_margin"],
+                info_page=_worker_options["info_page"],
+            )
+        elif _worker_options["chunk_size"]:
+            tool.streamProcess(
+                input_path,
+                output_path,
+                chunk_size=_worker_options["chunk_size"],
+                netto=_worker_options["netto"],
+                bleed=_worker_options["bleed"],
+                safe_margin=_worker_options["safe_margin"],
+                info_page=_worker_options["info_page"],
+            )
+        else:
+            tool.loadPDF(input_path)
+            tool.addPagesWithMarginAndAnnotations(
+                netto=_worker_options["netto"],
+                bleed=_worker_options["bleed"],
+                safe_margin=_worker_options["safe_margin"],
+            )
+            if _worker_options["info_page"]:
+                tool.addInfoPage()
+            if _worker_options["dedup"]:
+                tool.deduplicateResources()
+            tool.savePDF(output_path)
+            saved = tool.deduplicated_bytes
+        pages = tool.original_pdf.page_count
+        if key:
+            # The output is written, a cache failure must not fail the file
+            try:
+                _worker_cache.put(key, output_path)
+            except OSError as e:
+                print(
+                    f"Warning: could not store {input_path} in the result cache: {e}",
+                    file=sys.stderr,
+                )
+        elapsed = time.perf_counter() - start
+        timings = tool.getTimingsJSONLines(file=input_path)
+        return input_path, output_path, pages, elapsed, saved, timings, False, None
+    except Exception as e:
+        elapsed = time.perf_counter() - start
+        return input_path, output_path, 0, elapsed, 0, "", False, str(e)
+    finally:
+        tool.dumpProfile()
+        tool.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Process PDF files headlessly with PDF Format Tool."
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="Input PDF files, globs or directories"
+    )
+    parser.add_argument("-o", "--output-dir", help="Directory for processed files")
+    parser.add_argument(
+        "--suffix", default="_processed", help="Output file name suffix"
+    )
+    parser.add_argument(
+        "--netto",
+        nargs=2,
+        type=float,
+        metavar=("WIDTH", "HEIGHT"),
+        default=(100.0, 100.0),
+        help="Netto format in mm",
+    )
+    parser.add_argument("--bleed", type=float, default=3.0, help="Bleed size in mm")
+    parser.add_argument(
+        "--safe-margin", type=float, default=4.0, help="Safe margin size in mm"
+    )
+    parser.add_argument(
+        "--margin", type=float, default=5.0, help="Additional margin in mm"
+    )
+    parser.add_argument(
+        "--annotation-width", type=float, default=1.0, help="Annotation width in pt"
+    )
+    parser.add_argument("--no-info-page", action="store_true")
+    parser.add_argument("--no-netto", action="store_true")
+    parser.add_argument("--no-bleed", action="store_true")
+    parser.add_argument("--no-safe-margin", action="store_true")
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Merge identical fonts, images and Form XObjects in the output",
+    )
+    parser.add_argument(
+        "--save-profile",
+        choices=[profile.name.lower() for profile in PDF_Tool.SaveProfile],
+        default="fast",
+        help="fast: no compression, compact: garbage collection + deflate + "
+        "object streams, web: compact + linearised",
+    )
+    parser.add_argument(
+        "--frame-mode",
+        choices=[mode.value for mode in PDF_Tool.FrameMode],
+        default="annotations",
+        help="annotations: editable rect annotations, vector: frames drawn into "
+        "the page content from one shared object per page size",
+    )
+    parser.add_argument(
+        "--no-frame-layer",
+        action="store_true",
+        help="Do not put vector frames on a toggleable 'Frames' layer",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        metavar="PAGES",
+        help="Stream large inputs in chunks of this many pages to bound memory",
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes",
+    )
+    parser.add_argument(
+        "--page-workers",
+        type=int,
+        default=1,
+        help="Split the pages of each file over this many processes "
+        "(files are then processed one after another)",
+    )
+    parser.add_argument(
+        "--timings",
+        metavar="FILE",
+        help="Append per-stage timings of every file to FILE as JSON lines",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="DIR",
+        help="Write a cProfile and tracemalloc capture per file to DIR (slow)",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse results for unchanged inputs and settings from "
+        + get_default_cache_dir(),
+    )
+    parser.add_argument(
+        "--cache-dir", metavar="DIR", help="Result cache directory (implies --cache)"
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=2048,
+        metavar="MB",
+        help="Evict least recently used results above this size",
+    )
+    args = parser.parse_args(argv)
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.page_workers < 1:
+        parser.error("--page-workers must be at least 1")
+    if args.chunk_size and args.dedup:
+        parser.error("--dedup cannot be combined with --chunk-size")
+    if args.page_workers > 1 and (args.chunk_size or args.dedup):
+        parser.error("--page-workers cannot be combined with --chunk-size or --dedup")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    files = collect_input_files(args.inputs, args.suffix)
+    if not files:
+        print("No input PDF files found.", file=sys.stderr)
+        return 1
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    if args.profile:
+        os.makedirs(args.profile, exist_ok=True)
+
+    settings = {
+        "netto_format": tuple(args.netto),
+        "bleed_size": args.bleed,
+        "safe_margin_size": args.safe_margin,
+        "additional_margin": args.margin,
+        "annotation_width": args.annotation_width,
+    }
+    options = {
+        "info_page": not args.no_info_page,
+        "netto": not args.no_netto,
+        "bleed": not args.no_bleed,
+        "safe_margin": not args.no_safe_margin,
+        "dedup": args.dedup,
+        "save_profile": args.save_profile,
+        "frame_mode": args.frame_mode,
+        "frame_layer": not args.no_frame_layer,
+        "chunk_size": args.chunk_size,
+        "page_workers": args.page_workers,
+        "profile_dir": args.profile,
+        "cache_dir": args.cache_dir or (get_default_cache_dir() if args.cache else ""),
+        "cache_size": args.cache_size * 2**20,
+    }
+    if options["cache_dir"]:
+        # Checked here, a pool initializer that raises is restarted forever
+        try:
+            ResultCache(options["cache_dir"], options["cache_size"])
+        except OSError as e:
+            print(f"Result cache disabled: {e}", file=sys.stderr)
+            options["cache_dir"] = ""
+    # Chunked and page-parallel runs give the same pages, so they share entries
+    options["cache_settings"] = {
+        **settings,
+        **{
+            name: options[name]
+            for name in ("info_page", "netto", "bleed", "safe_margin", "dedup")
+        },
+        "save_profile": options["save_profile"],
+        "frame_mode": options["frame_mode"],
+        "frame_layer": options["frame_layer"],
+    }
+    jobs = [
+        (path, get_output_path(path, args.output_dir, args.suffix)) for path in files
+    ]
+
+    total_pages = 0
+    total_saved = 0
+    cache_hits = 0
+    failed = 0
+    timings_file = open(args.timings, "a") if args.timings else None
+    start = time.perf_counter()
+    if args.page_workers > 1:
+        # Pool workers cannot start pools of their own, so files run one
+        # after another here and each one is split over the page workers
+        print(
+            f"Processing {len(jobs)} file(s) with {args.page_workers} page worker(s)..."
+        )
+        pool = None
+        init_worker(settings, options)
+        results = map(process_file, jobs)
+    else:
+        workers = max(1, min(args.workers, len(jobs)))
+        print(f"Processing {len(jobs)} file(s) with {workers} worker(s)...")
+        pool = multiprocessing.Pool(
+            workers, initializer=init_worker, initargs=(settings, options)
+        )
+        results = pool.imap_unordered(process_file, jobs)
+    try:
+        for result in results:
+            input_path, output_path, pages, seconds, saved, timings, cached, error = (
+                result
+            )
+            if timings_file:
+                timings_file.write(timings)
+            name = os.path.basename(input_path)
+            if error:
+                failed += 1
+                print(f"FAILED {name} after {seconds:.2f}s: {error}")
+            else:
+                total_pages += pages
+                total_saved += saved
+                cache_hits += cached
+                source = " (cached)" if cached else ""
+                print(
+                    f"{name}: {pages} pages in {seconds:.2f}s{source} -> {output_path}"
+                )
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+        if timings_file:
+            timings_file.close()
+    elapsed = time.perf_counter() - start
+
+    done = len(jobs) - failed
+    print(
+        f"Done: {done} file(s), {total_pages} pages, {failed} failed in {elapsed:.2f}s "
+        f"({done / elapsed:.2f} files/s, {total_pages / elapsed:.1f} pages/s)"
+    )
+    if args.dedup:
+        print(f"Saved by resource deduplication: {total_saved / 1024:.1f} KiB")
+    if options["cache_dir"]:
+        stats = ResultCache(options["cache_dir"], options["cache_size"]).getStats()
+        print(
+            f"Result cache: {cache_hits} hit(s), {done - cache_hits} miss(es), "
+            f"{stats['entries']} entries, {stats['bytes'] / 2**20:.1f} MB"
+        )
+    peak_rss = get_peak_rss(children=True)
+    if peak_rss:
+        print(f"Peak worker RSS: {peak_rss / 2**20:.1f} MB")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,18 +1,48 @@
 import os
 import sys
-import io
-import tempfile
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from tkinter.scrolledtext import ScrolledText
-from PIL import Image, ImageTk
-import fitz
-from PDF_Tool import PDF_Tool
+from render_cache import RenderCache, pixmap_to_image
+from result_cache import ResultCache
+
+# PyMuPDF, Pillow and PDF_Tool take most of the startup time, they are
+# imported by _import_backends once the window is up
+fitz = Image = ImageTk = PDF_Tool = None
+
+# typing alone takes a noticeable part of the startup budget; type checkers
+# treat this constant like typing.TYPE_CHECKING
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from PIL import Image as PILImage
+
+# Names of PDF_Tool.SaveProfile and PDF_Tool.FrameMode, so the settings
+# panel needs no PyMuPDF
+SAVE_PROFILES = ("fast", "compact", "web")
+FRAME_MODES = ("annotations", "vector")
+
+
+def _import_backends() -> None:
+    global fitz, Image, ImageTk, PDF_Tool
+    import fitz
+    from PIL import Image, ImageTk
+    from PDF_Tool import PDF_Tool
 
 
 class PDFToolGUI:
     """GUI for PDF Format Tool."""
 
+    # Pages larger than this (in pixels at the current zoom) are rendered in
+    # tiles covering only the visible part of the canvas
+    TILED_RENDER_PIXELS = 4096 * 4096
+    TILE_SIZE = 512
+    # Zoom of the quick draft shown while the full resolution page renders
+    DRAFT_ZOOM = 0.25
+    # Wait this long after a frame setting changed before checking again
+    PREFLIGHT_DELAY_MS = 300
+
     def __init__(self, root):
         self.root = root
         self.root.title("PDF Format Tool")
@@ -30,7 +60,38 @@ class PDFToolGUI:
         self.current_page_obj = None
         self.zoom_level = tk.DoubleVar(value=1.0)
         self.image_tk = None
-        self.temp_pdf_path = None
+        self.render_cache = RenderCache()
+        self.prefetch_job = None
+        self.tiled_page = None
+        self.tiles = {}
+        self.tiles_job = None
+        self.refine_job = None
+        self.tool = None
+        self.job_tool = None
+        # Without a writable cache directory the GUI runs without the cache
+        try:
+            self.result_cache = ResultCache()
+            result_cache_error = None
+        except OSError as e:
+            self.result_cache = None
+            result_cache_error = str(e)
+        self.store_worker = None
+        # PDF_Tool used only for the frame geometry of the live overlay
+        self.overlay_tool = None
+        # Settings the processed document was built with, part of the cache key
+        self.cache_settings = None
+        self.worker = None
+        self.job_queue = queue.Queue()
+        self.open_worker = None
+        self.open_queue = queue.Queue()
+        # Preflight runs of an outdated file or settings are ignored by number
+        self.preflight_worker = None
+        self.preflight_tool = None
+        self.preflight_queue = queue.Queue()
+        self.preflight_run = 0
+        self.preflight_job = None
+        self.preflight_status = tk.StringVar(value="Open a PDF to check it")
+        self.progress = tk.DoubleVar(value=0)
         self.showing_output = tk.BooleanVar(value=False)
 
         # PDF Tool settings
@@ -46,6 +107,9 @@ class PDFToolGUI:
         self.add_netto_annotation = tk.BooleanVar(value=True)
         self.add_bleed_annotation = tk.BooleanVar(value=True)
         self.add_safe_margin_annotation = tk.BooleanVar(value=True)
+        self.save_profile = tk.StringVar(value="compact")
+        self.frame_mode = tk.StringVar(value="annotations")
+        self.live_overlay = tk.BooleanVar(value=False)
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         self.create_menu()
@@ -53,6 +117,29 @@ class PDFToolGUI:
         self.create_main_area()
         self.create_status_bar()
         self.update_status("No file opened")
+        if result_cache_error:
+            self.log(f"Result cache disabled: {result_cache_error}")
+
+        # Redraw the frame overlay whenever a frame setting changes
+        for variable in (
+            self.netto_width,
+            self.netto_height,
+            self.bleed_size,
+            self.safe_margin_size,
+            self.annotation_width,
+            self.add_netto_annotation,
+            self.add_bleed_annotation,
+            self.add_safe_margin_annotation,
+            self.live_overlay,
+        ):
+            variable.trace_add("write", lambda *_: self.draw_overlay())
+        for variable in (
+            self.netto_width,
+            self.netto_height,
+            self.bleed_size,
+            self.safe_margin_size,
+        ):
+            variable.trace_add("write", lambda *_: self.schedule_preflight())
 
     def create_menu(self):
         menu_bar = tk.Menu(self.root)
@@ -104,9 +191,14 @@ class PDFToolGUI:
         ttk.Button(toolbar, text="-", command=self.zoom_out).pack(side=tk.LEFT, padx=2)
         ttk.Label(toolbar, textvariable=self.zoom_level).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="+", command=self.zoom_in).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="Process PDF", command=self.process_pdf).pack(
-            side=tk.RIGHT, padx=5
+        self.cancel_button = ttk.Button(
+            toolbar, text="Cancel", command=self.cancel_processing, state=tk.DISABLED
         )
+        self.cancel_button.pack(side=tk.RIGHT, padx=5)
+        self.process_button = ttk.Button(
+            toolbar, text="Process PDF", command=self.process_pdf
+        )
+        self.process_button.pack(side=tk.RIGHT, padx=5)
         toolbar.pack(side=tk.TOP, fill=tk.X, pady=5)
 
     def create_main_area(self):
@@ -123,7 +215,10 @@ class PDFToolGUI:
         v_scroll = ttk.Scrollbar(
             canvas_frame, orient=tk.VERTICAL, command=self.canvas.yview
         )
-        self.canvas.config(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        self.canvas.config(
+            xscrollcommand=lambda *args: self.on_canvas_scroll(h_scroll, *args),
+            yscrollcommand=lambda *args: self.on_canvas_scroll(v_scroll, *args),
+        )
         h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
         v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
@@ -227,6 +322,48 @@ class PDFToolGUI:
         ttk.Button(
             settings_frame, text="Browse...", command=self.browse_output_file
         ).grid(row=9, column=4, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(settings_frame, text="Save Profile:").grid(
+            row=10, column=0, sticky=tk.W, padx=5, pady=5
+        )
+        ttk.Combobox(
+            settings_frame,
+            textvariable=self.save_profile,
+            values=SAVE_PROFILES,
+            state="readonly",
+            width=10,
+        ).grid(row=10, column=1, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Label(settings_frame, text="Frames:").grid(
+            row=11, column=0, sticky=tk.W, padx=5, pady=5
+        )
+        ttk.Combobox(
+            settings_frame,
+            textvariable=self.frame_mode,
+            values=FRAME_MODES,
+            state="readonly",
+            width=10,
+        ).grid(row=11, column=1, columnspan=2, sticky=tk.W, padx=5, pady=5)
+        ttk.Checkbutton(
+            settings_frame,
+            text="Live Frame Preview (drawn over the page, not saved)",
+            variable=self.live_overlay,
+        ).grid(row=12, column=0, columnspan=5, sticky=tk.W, padx=5, pady=5)
+        preflight_frame = ttk.LabelFrame(right_panel, text="Preflight")
+        preflight_frame.pack(side=tk.TOP, fill=tk.X, pady=(0, 10))
+        ttk.Label(preflight_frame, textvariable=self.preflight_status).pack(
+            side=tk.TOP, anchor=tk.W, padx=5
+        )
+        list_frame = ttk.Frame(preflight_frame)
+        list_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.preflight_list = tk.Listbox(
+            list_frame, height=8, activestyle=tk.NONE, exportselection=False
+        )
+        preflight_scroll = ttk.Scrollbar(
+            list_frame, orient=tk.VERTICAL, command=self.preflight_list.yview
+        )
+        self.preflight_list.config(yscrollcommand=preflight_scroll.set)
+        preflight_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        self.preflight_list.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.preflight_list.bind("<<ListboxSelect>>", self.on_preflight_select)
         log_frame = ttk.LabelFrame(right_panel, text="Log")
         log_frame.pack(side=tk.BOTTOM, fill=tk.BOTH, expand=True)
         self.log_text = ScrolledText(
@@ -235,15 +372,22 @@ class PDFToolGUI:
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
     def create_status_bar(self):
+        status_frame = ttk.Frame(self.root)
+        self.progress_bar = ttk.Progressbar(
+            status_frame, variable=self.progress, mode="determinate", length=200
+        )
+        self.progress_bar.pack(side=tk.RIGHT, padx=5)
         status_bar = ttk.Label(
-            self.root, textvariable=self.status, relief=tk.SUNKEN, anchor=tk.W
+            status_frame, textvariable=self.status, relief=tk.SUNKEN, anchor=tk.W
         )
-        status_bar.pack(side=tk.BOTTOM, fill=tk.X)
+        status_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X)
 
     def on_closing(self):
         """Handle application closing event."""
         try:
             self.log("Closing application, cleaning up resources...")
+            self.cancel_processing()
             self.cleanup()
             self.root.destroy()
         except Exception as e:
@@ -260,6 +404,15 @@ class PDFToolGUI:
         self.current_page_obj = None
         self.canvas.delete("all")
 
+        self.cancel_prefetch()
+        self.cancel_refine()
+        self.cancel_preflight()
+        self.preflight_list.delete(0, tk.END)
+        self.preflight_status.set("Open a PDF to check it")
+        self.render_cache.clear()
+        self.tiled_page = None
+        self.tiles = {}
+
         # Close documents and handle exceptions
         try:
             if self.doc:
@@ -269,21 +422,7 @@ class PDFToolGUI:
         except Exception as e:
             self.log(f"Error closing input document: {str(e)}")
 
-        try:
-            if self.output_doc:
-                if not getattr(self.output_doc, "is_closed", True):
-                    self.output_doc.close()
-                self.output_doc = None
-        except Exception as e:
-            self.log(f"Error closing output document: {str(e)}")
-
-        # Remove temporary files
-        if self.temp_pdf_path and os.path.exists(self.temp_pdf_path):
-            try:
-                os.remove(self.temp_pdf_path)
-                self.temp_pdf_path = None
-            except Exception as e:
-                self.log(f"Error removing temporary file: {str(e)}")
+        self.close_processed()
 
         # Force Python garbage collection
         import gc
@@ -296,10 +435,8 @@ class PDFToolGUI:
             # Try to clean up without any error handling
             if self.doc and not getattr(self.doc, "is_closed", True):
                 self.doc.close()
-            if self.output_doc and not getattr(self.output_doc, "is_closed", True):
-                self.output_doc.close()
-            if self.temp_pdf_path and os.path.exists(self.temp_pdf_path):
-                os.remove(self.temp_pdf_path)
+            if self.tool:
+                self.tool.close()
         except Exception:
             pass
         finally:
@@ -308,6 +445,18 @@ class PDFToolGUI:
 
             sys.exit(0)
 
+    def close_processed(self):
+        """Close the processed document together with the PDF_Tool that owns it."""
+        if self.output_doc:
+            self.render_cache.invalidate(self.output_doc)
+        self.output_doc = None
+        if self.tool:
+            try:
+                self.tool.close()
+            except Exception as e:
+                self.log(f"Error closing output document: {str(e)}")
+            self.tool = None
+
     def toggle_view(self):
         if not self.output_doc or getattr(self.output_doc, "is_closed", True):
             messagebox.showwarning(
@@ -348,23 +497,99 @@ class PDFToolGUI:
         )
         if not file_path:
             return
+        if self.is_processing():
+            messagebox.showwarning("Warning", "Please wait for processing to finish")
+            return
+        if self.is_opening():
+            messagebox.showwarning("Warning", "Please wait for the file to open")
+            return
         self.cleanup()
+        self.input_file.set(file_path)
+        self.current_page.set(1)
+        self.showing_output.set(False)
+        self.view_toggle_button.configure(text="Show Processed")
+        self.pdf_frame.configure(text="PDF Preview - Original")
+        self.output_file.set(file_path.replace(".pdf", "_processed.pdf"))
+        self.update_status(f"Opening: {os.path.basename(file_path)}...")
+
+        # Opening may repair a damaged file and rendering page 1 may take
+        # long for heavy pages, so both happen off the UI thread. self.doc
+        # is only set once the worker is done with the document.
+        self.open_worker = threading.Thread(
+            target=self.run_open,
+            args=(file_path, self.zoom_level.get()),
+            daemon=True,
+        )
+        self.open_worker.start()
+        self.root.after(10, self.poll_open)
+
+    def is_opening(self) -> bool:
+        return self.open_worker is not None and self.open_worker.is_alive()
+
+    def run_open(self, file_path: str, zoom: float) -> None:
+        """Worker thread body, talks to the GUI only through open_queue."""
+        doc = None
         try:
-            self.input_file.set(file_path)
-            self.doc = fitz.open(file_path)
-            self.total_pages.set(self.doc.page_count)
-            self.current_page.set(1)
-            self.showing_output.set(False)
-            self.view_toggle_button.configure(text="Show Processed")
-            self.pdf_frame.configure(text="PDF Preview - Original")
-            output_path = file_path.replace(".pdf", "_processed.pdf")
-            self.output_file.set(output_path)
-            self.update_status(f"Opened: {os.path.basename(file_path)}")
-            self.log(f"Page count: {self.doc.page_count}")
-            self.display_page(0)
+            _import_backends()
+            doc = fitz.open(file_path)
+            # The page count and the first page box come from the page tree
+            # without loading any page
+            self.open_queue.put(
+                ("opened", doc.page_count, doc.page_cropbox(0), doc.is_repaired)
+            )
+            page = doc[0]
+            pixels = page.rect.width * page.rect.height * zoom * zoom
+            # Tiled pages are rendered by update_tiles once displayed
+            img = None
+            if pixels <= self.TILED_RENDER_PIXELS:
+                img = self.render_page_image(page, zoom)
+            self.open_queue.put(("rendered", doc, zoom, img))
         except Exception as e:
-            self.update_status(f"Error opening file: {str(e)}")
-            messagebox.showerror("Error", f"Failed to open PDF: {str(e)}")
+            if doc:
+                doc.close()
+            self.open_queue.put(("error", str(e)))
+
+    def poll_open(self) -> None:
+        while True:
+            try:
+                message = self.open_queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "opened":
+                page_count, rect, repaired = message[1], message[2], message[3]
+                self.total_pages.set(page_count)
+                self.log(f"Page count: {page_count}")
+                self.log(f"First page: {rect.width:.1f} x {rect.height:.1f} pt")
+                if repaired:
+                    self.log("The file is damaged and was repaired while opening")
+                self.show_page_placeholder(rect)
+            elif kind == "rendered":
+                doc, zoom, img = message[1], message[2], message[3]
+                self.doc = doc
+                if img is not None:
+                    self.render_cache.put(RenderCache.key(doc, 0, zoom), img)
+                self.display_page(0)
+                name = os.path.basename(self.input_file.get())
+                self.update_status(f"Opened: {name}")
+                self.start_preflight()
+            elif kind == "error":
+                self.input_file.set("")
+                self.output_file.set("")
+                self.update_status(f"Error opening file: {message[1]}")
+                messagebox.showerror("Error", f"Failed to open PDF: {message[1]}")
+
+        if self.is_opening() or not self.open_queue.empty():
+            self.root.after(10, self.poll_open)
+
+    def show_page_placeholder(self, rect) -> None:
+        """Outline of the first page while it renders."""
+        zoom = self.zoom_level.get()
+        self.canvas.delete("all")
+        self.canvas.config(scrollregion=(0, 0, rect.width * zoom, rect.height * zoom))
+        self.canvas.create_rectangle(
+            0, 0, rect.width * zoom, rect.height * zoom, outline="gray", fill="white"
+        )
 
     def browse_output_file(self) -> None:
         file_path = filedialog.asksaveasfilename(
@@ -391,11 +616,20 @@ class PDFToolGUI:
             output_path = self.output_file.get()
             if not output_path:
                 return
+        if self.is_storing():
+            # The previous cache copy may still be reading this file
+            self.store_worker.join()
         try:
-            self.output_doc.save(output_path)
+            self.tool.setSaveProfile(self.save_profile.get()).savePDF(output_path)
             self.update_status(
                 f"Saved processed PDF to: {os.path.basename(output_path)}"
             )
+            self.log(
+                f"Save profile '{self.save_profile.get()}': "
+                f"{self.tool.save_size / 1024:.1f} KiB in {self.tool.save_time:.2f}s"
+            )
+            self.log(self.tool.getTimingsTable())
+            self.store_result(output_path)
             messagebox.showinfo(
                 "Success", f"File saved successfully to:\n{output_path}"
             )
@@ -403,6 +637,34 @@ class PDFToolGUI:
             self.update_status(f"Error saving file: {str(e)}")
             messagebox.showerror("Error", f"Failed to save PDF: {str(e)}")
 
+    def store_result(self, output_path: str) -> None:
+        """Copy a saved result into the result cache on a worker thread.
+
+        Hashing the input and copying the output take long for large files,
+        failures are only logged.
+        """
+        if not self.cache_settings or not self.result_cache:
+            return
+        settings = {**self.cache_settings, "save_profile": self.save_profile.get()}
+        self.store_worker = threading.Thread(
+            target=self.run_store,
+            args=(self.tool.input_pdf_path, settings, output_path),
+            daemon=True,
+        )
+        self.store_worker.start()
+        self.root.after(50, self.poll_job)
+
+    def is_storing(self) -> bool:
+        return self.store_worker is not None and self.store_worker.is_alive()
+
+    def run_store(self, input_path: str, settings: dict, output_path: str) -> None:
+        """Worker thread body, talks to the GUI only through job_queue."""
+        try:
+            key = self.result_cache.key(input_path, settings)
+            self.result_cache.put(key, output_path)
+        except OSError as e:
+            self.job_queue.put(("log", f"Could not store result in cache: {str(e)}"))
+
     def is_document_valid(self, doc):
         if doc is None or getattr(doc, "is_closed", True):
             return False
@@ -426,18 +688,30 @@ class PDFToolGUI:
             or page_index >= doc_to_display.page_count
         ):
             return
+        self.cancel_refine()
+        self.cancel_prefetch()
         self.current_page.set(page_index + 1)
         self.current_page_obj = doc_to_display[page_index]
         self.total_pages.set(doc_to_display.page_count)
         try:
             zoom = self.zoom_level.get()
-            pix = self.current_page_obj.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
-            img_data = pix.tobytes("ppm")
-            img = Image.open(io.BytesIO(img_data))
-            self.image_tk = ImageTk.PhotoImage(image=img)
             self.canvas.delete("all")
-            self.canvas.config(scrollregion=(0, 0, img.width, img.height))
-            self.canvas.create_image(0, 0, anchor=tk.NW, image=self.image_tk)
+            self.tiles = {}
+            page_rect = self.current_page_obj.rect
+            if (
+                page_rect.width * page_rect.height * zoom * zoom
+                > self.TILED_RENDER_PIXELS
+            ):
+                self.image_tk = None
+                self.tiled_page = (doc_to_display, page_index, zoom)
+                self.canvas.config(
+                    scrollregion=(0, 0, page_rect.width * zoom, page_rect.height * zoom)
+                )
+                self.update_tiles()
+                self.draw_overlay()
+            else:
+                self.tiled_page = None
+                self.show_page_image(doc_to_display, page_index, zoom)
             doc_type = "processed" if self.showing_output.get() else "original"
             self.update_status(
                 f"Displaying {doc_type} PDF - page {page_index + 1} of {doc_to_display.page_count}"
@@ -445,6 +719,193 @@ class PDFToolGUI:
         except Exception as e:
             self.update_status(f"Error displaying page: {str(e)}")
 
+    def show_page_image(self, doc, page_index: int, zoom: float) -> None:
+        img = self.render_cache.get(RenderCache.key(doc, page_index, zoom))
+        if img is None and zoom > self.DRAFT_ZOOM:
+            # Show a cheap low resolution draft now, refine it when idle
+            page = doc[page_index]
+            draft = self.render_page_image(page, self.DRAFT_ZOOM).resize(
+                (round(page.rect.width * zoom), round(page.rect.height * zoom)),
+                Image.BILINEAR,
+            )
+            self.place_page_image(draft)
+            self.refine_job = self.root.after(
+                10, lambda: self.refine_page_image(doc, page_index, zoom)
+            )
+            return
+        if img is None:
+            img = self.get_page_image(doc, page_index, zoom)
+        self.place_page_image(img)
+        self.schedule_prefetch(doc, page_index, zoom)
+
+    def refine_page_image(self, doc, page_index: int, zoom: float) -> None:
+        # Dropped via cancel_refine if another page or zoom was requested first
+        self.refine_job = None
+        if not self.is_document_valid(doc):
+            return
+        try:
+            self.place_page_image(self.get_page_image(doc, page_index, zoom))
+            self.schedule_prefetch(doc, page_index, zoom)
+        except Exception as e:
+            self.update_status(f"Error displaying page: {str(e)}")
+
+    def cancel_refine(self) -> None:
+        if self.refine_job:
+            self.root.after_cancel(self.refine_job)
+            self.refine_job = None
+
+    def place_page_image(self, img) -> None:
+        self.image_tk = ImageTk.PhotoImage(image=img)
+        self.canvas.delete("all")
+        self.canvas.config(scrollregion=(0, 0, img.width, img.height))
+        self.canvas.create_image(0, 0, anchor=tk.NW, image=self.image_tk)
+        self.draw_overlay()
+
+    def draw_overlay(self) -> None:
+        """Draw the frames for the current settings as canvas items over the page."""
+        self.canvas.delete("overlay")
+        if not self.live_overlay.get() or self.current_page_obj is None:
+            return
+        if (
+            self.showing_output.get()
+            and self.tool
+            and self.current_page.get() <= self.tool.info_page_count
+        ):
+            return
+        settings = self.read_settings()
+        if settings is None:
+            return
+        zoom = self.zoom_level.get()
+        page_rect = self.current_page_obj.rect
+
+        # Keep the tool while the settings stay the same, its geometry table
+        # then serves every page of the document
+        if not self.overlay_tool or self.overlay_tool.getSettings() != settings:
+            self.overlay_tool = PDF_Tool().applySettings(settings)
+        frames = self.overlay_tool.getFrameRects(
+            page_rect.width,
+            page_rect.height,
+            netto=self.add_netto_annotation.get(),
+            bleed=self.add_bleed_annotation.get(),
+            safe_margin=self.add_safe_margin_annotation.get(),
+        )
+        for rect, color in frames:
+            self.canvas.create_rectangle(
+                rect.x0 * zoom,
+                rect.y0 * zoom,
+                rect.x1 * zoom,
+                rect.y1 * zoom,
+                outline="#%02x%02x%02x" % tuple(int(c * 255) for c in color.value),
+                width=max(1, settings["annotation_width"] * zoom),
+                tags="overlay",
+            )
+
+    def render_page_image(self, page, zoom: float) -> "PILImage.Image":
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom))
+        return pixmap_to_image(pix)
+
+    def get_page_image(self, doc, page_index: int, zoom: float) -> "PILImage.Image":
+        key = RenderCache.key(doc, page_index, zoom)
+        img = self.render_cache.get(key)
+        if img is None:
+            img = self.render_page_image(doc[page_index], zoom)
+            self.render_cache.put(key, img)
+        return img
+
+    def on_canvas_scroll(self, scrollbar, first, last) -> None:
+        scrollbar.set(first, last)
+        # Coalesce scroll and resize events into one tile update
+        if self.tiled_page and not self.tiles_job:
+            self.tiles_job = self.root.after_idle(self.update_tiles)
+
+    def update_tiles(self) -> None:
+        """Show the tiles overlapping the visible canvas region, drop the rest."""
+        self.tiles_job = None
+        if not self.tiled_page:
+            return
+        doc, page_index, zoom = self.tiled_page
+        if not self.is_document_valid(doc):
+            return
+        page = doc[page_index]
+        width, height = page.rect.width * zoom, page.rect.height * zoom
+        size = self.TILE_SIZE
+
+        left = max(0, int(self.canvas.canvasx(0) // size))
+        top = max(0, int(self.canvas.canvasy(0) // size))
+        right = min(
+            int((width - 1) // size),
+            int((self.canvas.canvasx(0) + self.canvas.winfo_width()) // size),
+        )
+        bottom = min(
+            int((height - 1) // size),
+            int((self.canvas.canvasy(0) + self.canvas.winfo_height()) // size),
+        )
+        visible = {
+            (column, row)
+            for column in range(left, right + 1)
+            for row in range(top, bottom + 1)
+        }
+
+        for tile in [tile for tile in self.tiles if tile not in visible]:
+            item, _ = self.tiles.pop(tile)
+            self.canvas.delete(item)
+
+        for column, row in visible - self.tiles.keys():
+            key = RenderCache.tile_key(doc, page_index, zoom, column, row)
+            img = self.render_cache.get(key)
+            if img is None:
+                clip = fitz.Rect(
+                    column * size / zoom,
+                    row * size / zoom,
+                    min(width, (column + 1) * size) / zoom,
+                    min(height, (row + 1) * size) / zoom,
+                )
+                pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip)
+                img = pixmap_to_image(pix)
+                self.render_cache.put(key, img)
+            image_tk = ImageTk.PhotoImage(image=img)
+            item = self.canvas.create_image(
+                column * size, row * size, anchor=tk.NW, image=image_tk
+            )
+            self.tiles[(column, row)] = (item, image_tk)
+
+        # Newly created tiles would otherwise cover the frame overlay
+        if self.live_overlay.get():
+            self.canvas.tag_raise("overlay")
+
+    def schedule_prefetch(self, doc, page_index: int, zoom: float) -> None:
+        """Render the next and previous pages into the cache while the GUI is idle."""
+        self.cancel_prefetch()
+        pending = [
+            index
+            for index in (page_index + 1, page_index - 1)
+            if 0 <= index < doc.page_count
+            and RenderCache.key(doc, index, zoom) not in self.render_cache
+        ]
+
+        def prefetch_next():
+            self.prefetch_job = None
+            if not pending or not self.is_document_valid(doc):
+                return
+            index = pending.pop(0)
+            try:
+                self.render_cache.put(
+                    RenderCache.key(doc, index, zoom),
+                    self.render_page_image(doc[index], zoom),
+                )
+            except Exception:
+                return
+            if pending:
+                self.prefetch_job = self.root.after(50, prefetch_next)
+
+        if pending:
+            self.prefetch_job = self.root.after(100, prefetch_next)
+
+    def cancel_prefetch(self) -> None:
+        if self.prefetch_job:
+            self.root.after_cancel(self.prefetch_job)
+            self.prefetch_job = None
+
     def next_page(self) -> None:
         doc_to_display = (
             self.output_doc
@@ -479,7 +940,27 @@ class PDFToolGUI:
         self.zoom_level.set(round(new_zoom, 1))
         self.display_page(self.current_page.get() - 1)
 
+    def read_settings(self) -> "dict | None":
+        """PDF_Tool settings from the settings panel, None while not valid."""
+        try:
+            return {
+                "netto_format": (self.netto_width.get(), self.netto_height.get()),
+                "bleed_size": self.bleed_size.get(),
+                "safe_margin_size": self.safe_margin_size.get(),
+                "additional_margin": self.additional_margin.get(),
+                "annotation_width": self.annotation_width.get(),
+            }
+        except (tk.TclError, ValueError):
+            # A Spinbox is being edited and holds no valid number yet
+            return None
+
+    def is_processing(self) -> bool:
+        return self.worker is not None and self.worker.is_alive()
+
     def process_pdf(self) -> None:
+        if self.is_processing():
+            messagebox.showwarning("Warning", "PDF is already being processed")
+            return
         if not self.is_document_valid(self.doc):
             messagebox.showwarning("Warning", "No PDF file is open")
             return
@@ -487,77 +968,302 @@ class PDFToolGUI:
             messagebox.showwarning("Warning", "Please select an input PDF file first")
             return
 
-        # Close output document and temporary file, but keep the input document
-        if self.output_doc and not getattr(self.output_doc, "is_closed", True):
-            try:
-                self.output_doc.close()
-                self.output_doc = None
-            except Exception as e:
-                self.log(f"Error closing output document: {str(e)}")
+        # Tk variables may only be read on the main thread
+        settings = self.read_settings()
+        if settings is None:
+            messagebox.showwarning("Warning", "Please enter valid settings")
+            return
+        try:
+            options = {
+                "input_path": self.input_file.get(),
+                "netto": self.add_netto_annotation.get(),
+                "bleed": self.add_bleed_annotation.get(),
+                "safe_margin": self.add_safe_margin_annotation.get(),
+                "info_page": self.add_info_page.get(),
+                "save_profile": self.save_profile.get(),
+                "frame_mode": self.frame_mode.get(),
+            }
+            options["cache_settings"] = {
+                **settings,
+                **{
+                    name: options[name]
+                    for name in ("info_page", "netto", "bleed", "safe_margin")
+                },
+                "dedup": False,
+                "frame_mode": options["frame_mode"],
+                "frame_layer": True,
+            }
+        except Exception as e:
+            self.update_status(f"Error processing PDF: {str(e)}")
+            messagebox.showerror("Error", f"Failed to process PDF: {str(e)}")
+            return
 
-        if self.temp_pdf_path and os.path.exists(self.temp_pdf_path):
-            try:
-                os.remove(self.temp_pdf_path)
-                self.temp_pdf_path = None
-            except Exception as e:
-                self.log(f"Error removing temporary file: {str(e)}")
+        if self.showing_output.get():
+            self.toggle_view()
+
+        # Reuse the margin pages of the previous run when only the frame
+        # settings of annotation frames changed, otherwise start over with a
+        # new PDF_Tool
+        tool = self.tool
+        if tool and not tool.applySettings(settings).setFrameMode(
+            options["frame_mode"]
+        ).needsRebuild(options["input_path"]):
+            self.render_cache.invalidate(self.output_doc)
+            self.output_doc = None
+            self.tool = None
+            options["incremental"] = True
+        else:
+            self.close_processed()
+            tool = (
+                PDF_Tool().applySettings(settings).setFrameMode(options["frame_mode"])
+            )
+            options["incremental"] = False
 
-        tool = None
+        worker = self.preflight_worker
+        if worker and worker.is_alive():
+            # Keep MuPDF to one worker thread; the check stops at the next
+            # page and runs again once processing is done
+            self.cancel_preflight()
+            worker.join()
+            self.schedule_preflight()
+
+        tool.setProgressCallback(
+            lambda done, total: self.job_queue.put(("progress", done, total))
+        )
+        self.job_tool = tool
+        self.worker = threading.Thread(
+            target=self.run_job, args=(tool, options), daemon=True
+        )
+        self.set_processing(True)
+        self.update_status("Processing PDF...")
+        self.worker.start()
+        self.root.after(50, self.poll_job)
+
+    def run_job(self, tool, options: dict) -> None:
+        """Worker thread body, talks to the GUI only through job_queue."""
         try:
-            tool = PDF_Tool()
-            tool.setNettoFormat(self.netto_width.get(), self.netto_height.get())
-            tool.setAdditionalMargin(self.additional_margin.get())
-            tool.setBleedSize(self.bleed_size.get())
-            tool.setSafeMarginSize(self.safe_margin_size.get())
-            tool.setAnnotationWidth(self.annotation_width.get())
-            self.log("Loading PDF...")
-            tool.loadPDF(self.input_file.get())
-            self.log("Adding pages with margin...")
-            tool.addPagesWithMargin()
-            if self.add_netto_annotation.get():
-                self.log("Adding netto format annotation...")
-                tool.addNettoFormatAnnotation()
-            if self.add_bleed_annotation.get():
-                self.log("Adding bleed size annotation...")
-                tool.addBleedSizeAnnotation()
-            if self.add_safe_margin_annotation.get():
-                self.log("Adding safe margin annotation...")
-                tool.addSafeMarginSizeAnnotation()
-            if self.add_info_page.get():
-                self.log("Adding info page...")
+            if options["incremental"]:
+                tool.timings = []
+                self.job_queue.put(("log", "Updating annotations..."))
+                tool.updateAnnotations(
+                    netto=options["netto"],
+                    bleed=options["bleed"],
+                    safe_margin=options["safe_margin"],
+                )
+                if options["info_page"] != tool.info_page_added:
+                    tool.removeInfoPage()
+            else:
+                self.job_queue.put(("log", "Loading PDF..."))
+                tool.loadPDF(options["input_path"])
+                cached_path = None
+                if self.result_cache:
+                    key = self.result_cache.key(
+                        options["input_path"],
+                        {
+                            **options["cache_settings"],
+                            "save_profile": options["save_profile"],
+                        },
+                    )
+                    cached_path = self.result_cache.get(key)
+                if cached_path:
+                    self.job_queue.put(("log", "Using cached result..."))
+                    tool.loadCachedOutput(cached_path, options["info_page"])
+                else:
+                    self.job_queue.put(
+                        ("log", "Adding pages with margin and annotations...")
+                    )
+                    tool.addPagesWithMarginAndAnnotations(
+                        netto=options["netto"],
+                        bleed=options["bleed"],
+                        safe_margin=options["safe_margin"],
+                    )
+            if options["info_page"] and not tool.info_page_added:
+                self.job_queue.put(("log", "Adding info page..."))
                 tool.addInfoPage()
-            fd, self.temp_pdf_path = tempfile.mkstemp(suffix=".pdf")
-            os.close(fd)
-            tool.output_pdf.save(self.temp_pdf_path)
-
-            # Open the saved temporary copy
-            self.output_doc = fitz.open(self.temp_pdf_path)
-            self.update_status("PDF processed successfully")
-            self.showing_output.set(True)
-            self.view_toggle_button.configure(text="Show Original")
-            self.pdf_frame.configure(text="PDF Preview - Processed")
-            self.display_page(0)
-            if messagebox.askyesno(
-                "Save File", "PDF processed successfully. Do you want to save it now?"
-            ):
-                self.save_file()
+
+            # Keep the processed document in memory for the preview, it is
+            # only written to disk once by save_file
+            tool.close(keep_output=True)
+            self.job_queue.put(("done", tool, options["cache_settings"]))
+        except PDF_Tool.Cancelled:
+            tool.close()
+            self.job_queue.put(("cancelled",))
         except Exception as e:
-            self.update_status(f"Error processing PDF: {str(e)}")
-            messagebox.showerror("Error", f"Failed to process PDF: {str(e)}")
+            tool.close()
+            self.job_queue.put(("error", str(e)))
+
+    def poll_job(self) -> None:
+        while True:
+            try:
+                message = self.job_queue.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "log":
+                self.log(message[1])
+            elif kind == "progress":
+                done, total = message[1], message[2]
+                self.progress_bar.configure(maximum=total)
+                self.progress.set(done)
+                self.status.set(f"Processing page {done} of {total}...")
+            elif kind == "done":
+                self.finish_job(message[1], message[2])
+            elif kind == "cancelled":
+                self.set_processing(False)
+                self.update_status("Processing cancelled")
+            elif kind == "error":
+                self.set_processing(False)
+                self.update_status(f"Error processing PDF: {message[1]}")
+                messagebox.showerror("Error", f"Failed to process PDF: {message[1]}")
+
+        if self.is_processing() or self.is_storing() or not self.job_queue.empty():
+            self.root.after(50, self.poll_job)
+
+    def finish_job(self, tool, cache_settings: dict) -> None:
+        self.set_processing(False)
+        self.tool = tool
+        self.output_doc = tool.output_pdf
+        self.cache_settings = cache_settings
+        self.log(tool.getTimingsTable())
+        if self.result_cache:
+            self.log(
+                f"Result cache: {self.result_cache.hits} hit(s), "
+                f"{self.result_cache.misses} miss(es)"
+            )
+        self.update_status("PDF processed successfully")
+        self.showing_output.set(True)
+        self.view_toggle_button.configure(text="Show Original")
+        self.pdf_frame.configure(text="PDF Preview - Processed")
+        self.display_page(0)
+        if messagebox.askyesno(
+            "Save File", "PDF processed successfully. Do you want to save it now?"
+        ):
+            self.save_file()
+
+    def schedule_preflight(self) -> None:
+        """Check again once the frame settings stopped changing."""
+        if self.preflight_job:
+            self.root.after_cancel(self.preflight_job)
+        self.preflight_job = self.root.after(
+            self.PREFLIGHT_DELAY_MS, self.start_preflight
+        )
+
+    def start_preflight(self) -> None:
+        self.preflight_job = None
+        if not self.is_document_valid(self.doc) or not self.input_file.get():
+            return
+        if self.is_processing():
+            # PyMuPDF does not support use from several threads, check once
+            # the processing job is done
+            self.schedule_preflight()
+            return
+        settings = self.read_settings()
+        if settings is None:
+            return
+
+        self.cancel_preflight()
+        run = self.preflight_run
+        # A separate PDF_Tool and document, self.doc belongs to the UI thread
+        tool = PDF_Tool().applySettings(settings)
+        tool.setProgressCallback(
+            lambda done, total: self.preflight_queue.put(("progress", run, done, total))
+        )
+        self.preflight_tool = tool
+        self.preflight_status.set("Checking pages...")
+        self.preflight_worker = threading.Thread(
+            target=self.run_preflight,
+            args=(tool, self.input_file.get(), run),
+            daemon=True,
+        )
+        self.preflight_worker.start()
+        self.root.after(50, self.poll_preflight)
+
+    def run_preflight(self, tool, input_path: str, run: int) -> None:
+        """Worker thread body, talks to the GUI only through preflight_queue."""
+        try:
+            tool.loadPDF(input_path).runPreflight()
+            seconds = tool.timings[-1].wall_time
+            self.preflight_queue.put(("done", run, tool.preflight_results, seconds))
+        except PDF_Tool.Cancelled:
+            pass
+        except Exception as e:
+            self.preflight_queue.put(("error", run, str(e)))
         finally:
-            # Clean up tool resources even if there was an error
-            if tool:
-                try:
-                    tool.close()
-                except Exception as e:
-                    self.log(f"Error closing PDF_Tool: {str(e)}")
+            tool.close()
 
-            # Force garbage collection
-            import gc
+    def poll_preflight(self) -> None:
+        while True:
+            try:
+                message = self.preflight_queue.get_nowait()
+            except queue.Empty:
+                break
+            kind, run = message[0], message[1]
+            if run != self.preflight_run:
+                continue
+            if kind == "progress":
+                self.preflight_status.set(
+                    f"Checking page {message[2]} of {message[3]}..."
+                )
+            elif kind == "done":
+                self.show_preflight(message[2], message[3])
+            elif kind == "error":
+                self.preflight_status.set("Preflight failed")
+                self.log(f"Preflight failed: {message[2]}")
 
-            gc.collect()
+        worker = self.preflight_worker
+        if (worker and worker.is_alive()) or not self.preflight_queue.empty():
+            self.root.after(50, self.poll_preflight)
+
+    def show_preflight(self, results: list, seconds: float) -> None:
+        """List every page, failing ones highlighted."""
+        self.preflight_list.delete(0, tk.END)
+        for result in results:
+            self.preflight_list.insert(
+                tk.END, f"{result.page + 1:>4}  {result.describe()}"
+            )
+            if not result.passed:
+                self.preflight_list.itemconfig(
+                    tk.END, background="#ffd6d6", foreground="#a00000"
+                )
+        failed = sum(not result.passed for result in results)
+        summary = f"{failed} of {len(results)} page(s) failed"
+        self.preflight_status.set(f"{summary} ({seconds:.2f}s)")
+        self.log(f"Preflight: {summary} in {seconds:.2f}s")
+
+    def on_preflight_select(self, event=None) -> None:
+        """Show the selected page of the original document."""
+        selection = self.preflight_list.curselection()
+        if not selection:
+            return
+        if self.showing_output.get():
+            self.toggle_view()
+        self.display_page(selection[0])
+
+    def cancel_preflight(self) -> None:
+        # Results of a running check are dropped, the worker stops at the
+        # next page
+        self.preflight_run += 1
+        if self.preflight_tool:
+            self.preflight_tool.cancel()
+            self.preflight_tool = None
+
+    def cancel_processing(self) -> None:
+        if self.is_processing() and self.job_tool:
+            self.log("Cancelling...")
+            self.job_tool.cancel()
+
+    def set_processing(self, processing: bool) -> None:
+        if processing:
+            self.progress.set(0)
+            self.process_button.configure(state=tk.DISABLED)
+            self.cancel_button.configure(state=tk.NORMAL)
+        else:
+            self.job_tool = None
+            self.process_button.configure(state=tk.NORMAL)
+            self.cancel_button.configure(state=tk.DISABLED)
 
     def show_about(self) -> None:
+        _import_backends()
         about_text = f"""PDF Format Tool\n\nVersion: 1.0\nPython version: {sys.version.split()[0]}\nPyMuPDF version: {fitz.__version__}\n\nA tool for adding format annotations to PDF documents."""
         messagebox.showinfo("About", about_text)
 
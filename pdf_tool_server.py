@@ -0,0 +1,439 @@
+#!/usr/bin/env python
+"""Local HTTP service that processes uploaded PDFs with PDF_Tool.
+
+    POST /jobs?netto=210x297&bleed=3&save_profile=compact   body: the PDF
+        Responds with the processed PDF (chunked), or a JSON error.
+    GET /stats
+        Queue depth, jobs in flight, counters, latency percentiles and the
+        disk I/O saved by processing in memory.
+
+Query parameters of /jobs (all optional, CLI defaults otherwise):
+    netto=WxH, bleed, safe_margin, margin (mm), annotation_width (pt),
+    info_page, netto_frame, bleed_frame, safe_margin_frame, frame_layer (0/1),
+    save_profile (fast/compact/web), frame_mode (annotations/vector)
+
+Listens on localhost or a Unix socket only, there is no authentication.
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import signal
+import asyncio
+import io
+import argparse
+import collections
+import multiprocessing
+from urllib.parse import urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from PDF_Tool import PDF_Tool
+
+STREAM_CHUNK_SIZE = 256 * 1024
+LATENCY_WINDOW = 1000
+# Of a rejected upload read this much before closing, so the client sees
+# the error response instead of a connection reset
+DISCARD_LIMIT = 4 * 1024 * 1024
+DISCARD_TIMEOUT = 2.0
+
+DEFAULT_SETTINGS = {
+    "netto_format": (100.0, 100.0),
+    "bleed_size": 3.0,
+    "safe_margin_size": 4.0,
+    "additional_margin": 5.0,
+    "annotation_width": 1.0,
+}
+DEFAULT_OPTIONS = {
+    "info_page": True,
+    "netto": True,
+    "bleed": True,
+    "safe_margin": True,
+    "save_profile": "fast",
+    "frame_mode": "annotations",
+    "frame_layer": True,
+}
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def percentile(values, fraction: float) -> "float | None":
+    """Nearest-rank percentile, None without values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def parse_job_query(query: str) -> tuple:
+    """Settings and options for PDF_Tool from the /jobs query string."""
+    params = {name: values[-1] for name, values in parse_qs(query).items()}
+    settings = dict(DEFAULT_SETTINGS)
+    options = dict(DEFAULT_OPTIONS)
+    try:
+        if "netto" in params:
+            width, height = params.pop("netto").lower().split("x")
+            settings["netto_format"] = (float(width), float(height))
+        for param, name in (
+            ("bleed", "bleed_size"),
+            ("safe_margin", "safe_margin_size"),
+            ("margin", "additional_margin"),
+            ("annotation_width", "annotation_width"),
+        ):
+            if param in params:
+                settings[name] = float(params.pop(param))
+        for param, name in (
+            ("info_page", "info_page"),
+            ("netto_frame", "netto"),
+            ("bleed_frame", "bleed"),
+            ("safe_margin_frame", "safe_margin"),
+            ("frame_layer", "frame_layer"),
+        ):
+            if param in params:
+                options[name] = params.pop(param).lower() in ("1", "true", "yes")
+        if "save_profile" in params:
+            options["save_profile"] = PDF_Tool.SaveProfile[
+                params.pop("save_profile").upper()
+            ].name.lower()
+        if "frame_mode" in params:
+            options["frame_mode"] = PDF_Tool.FrameMode(params.pop("frame_mode")).value
+    except (ValueError, KeyError) as e:
+        raise RequestError(400, f"Invalid job parameter: {e}")
+    if params:
+        raise RequestError(400, f"Unknown job parameter(s): {', '.join(params)}")
+    return settings, options
+
+
+def init_worker() -> None:
+    # Build the info page template before the first job arrives
+    PDF_Tool.getInfoPageTemplate()
+
+
+def run_job(input_bytes: bytes, settings: dict, options: dict) -> tuple:
+    """Pool worker: process one upload, returns (output bytes, pages, seconds).
+
+    Input and output stay in memory, no temporary files are written.
+    """
+    start = time.perf_counter()
+    output = io.BytesIO()
+    tool = (
+        PDF_Tool()
+        .applySettings(settings)
+        .setSaveProfile(options["save_profile"])
+        .setFrameMode(options["frame_mode"], options["frame_layer"])
+    )
+    try:
+        tool.loadPDF(input_bytes)
+        tool.addPagesWithMarginAndAnnotations(
+            netto=options["netto"],
+            bleed=options["bleed"],
+            safe_margin=options["safe_margin"],
+        )
+        if options["info_page"]:
+            tool.addInfoPage()
+        tool.savePDF(output)
+        pages = tool.original_pdf.page_count
+    finally:
+        tool.close()
+    return output.getvalue(), pages, time.perf_counter() - start
+
+
+class JobServer:
+    def __init__(self, workers: int, max_queue: int, max_upload_bytes: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_upload_bytes = max_upload_bytes
+        self.pool = ProcessPoolExecutor(workers, initializer=init_worker)
+        # Jobs beyond the pool size wait here, so the pool never queues work
+        self.slots = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        # Bytes a temp file round-trip would have written and read back
+        self.saved_io_bytes = 0
+        self.job_count = 0
+        self.started = time.monotonic()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    def get_stats(self) -> dict:
+        latencies = list(self.latencies)
+        uptime = time.monotonic() - self.started
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "saved_io_bytes": self.saved_io_bytes,
+            "uptime_s": round(uptime, 3),
+            "latency_ms": {
+                name: round(value * 1000, 1) if value is not None else None
+                for name, value in (
+                    ("p50", percentile(latencies, 0.50)),
+                    ("p95", percentile(latencies, 0.95)),
+                    ("p99", percentile(latencies, 0.99)),
+                )
+            },
+        }
+
+    async def handle_connection(self, reader, writer) -> None:
+        try:
+            method, target, headers = await self.read_request_head(reader)
+            url = urlsplit(target)
+            if url.path == "/stats":
+                if method != "GET":
+                    raise RequestError(405, "Use GET for /stats")
+                await self.send_json(writer, 200, self.get_stats())
+            elif url.path == "/jobs":
+                if method != "POST":
+                    raise RequestError(405, "Use POST for /jobs")
+                await self.handle_job(reader, writer, url.query, headers)
+            else:
+                raise RequestError(404, f"No such endpoint: {url.path}")
+        except RequestError as e:
+            await self.send_json(writer, e.status, {"error": str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request_head(self, reader) -> tuple:
+        request_line = await reader.readline()
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise RequestError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method, target, headers
+
+    async def handle_job(self, reader, writer, query: str, headers: dict) -> None:
+        received = time.perf_counter()
+        try:
+            settings, options = parse_job_query(query)
+            length = self.check_upload(headers)
+        except RequestError as e:
+            await self.send_json(writer, e.status, {"error": str(e)})
+            await self.discard_body(reader, headers)
+            return
+
+        # Take the queue slot before buffering the upload, otherwise any
+        # number of concurrent uploads pass the queue check at once
+        self.queued += 1
+        try:
+            if headers.get("expect", "").lower() == "100-continue":
+                # curl waits a second for this before sending bodies over 1 MB
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                await writer.drain()
+            input_bytes = await reader.readexactly(length)
+            self.job_count += 1
+            job_id = self.job_count
+            await self.slots.acquire()
+        finally:
+            self.queued -= 1
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            output_bytes, pages, seconds = await loop.run_in_executor(
+                self.pool, run_job, input_bytes, settings, options
+            )
+        except Exception as e:
+            self.failed += 1
+            raise RequestError(500, f"Processing failed: {e}")
+        finally:
+            self.in_flight -= 1
+            self.slots.release()
+
+        # Input and output would each be written to disk and read back
+        saved_io = 2 * (length + len(output_bytes))
+        self.saved_io_bytes += saved_io
+        self.latencies.append(time.perf_counter() - received)
+        self.completed += 1
+        await self.send_body(
+            writer,
+            output_bytes,
+            {
+                "X-Job-Id": job_id,
+                "X-Pages": pages,
+                "X-Processing-Seconds": f"{seconds:.3f}",
+                "X-Saved-IO-Bytes": saved_io,
+            },
+        )
+
+    def check_upload(self, headers: dict) -> int:
+        """Content-Length of an acceptable upload, RequestError otherwise."""
+        if "content-length" not in headers:
+            raise RequestError(411, "Content-Length is required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise RequestError(400, "Content-Length must be an integer")
+        if length < 0:
+            raise RequestError(400, "Content-Length must not be negative")
+        if length > self.max_upload_bytes:
+            raise RequestError(413, f"Upload larger than {self.max_upload_bytes} bytes")
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise RequestError(503, "Job queue is full")
+        return length
+
+    async def discard_body(self, reader, headers: dict) -> None:
+        """Read up to DISCARD_LIMIT of a rejected request body."""
+        try:
+            remaining = min(int(headers.get("content-length", 0)), DISCARD_LIMIT)
+        except ValueError:
+            return
+        try:
+            while remaining > 0:
+                chunk = await asyncio.wait_for(
+                    reader.read(min(remaining, STREAM_CHUNK_SIZE)), DISCARD_TIMEOUT
+                )
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+
+    async def send_head(self, writer, status: int, headers: dict) -> None:
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def send_json(self, writer, status: int, data: dict) -> None:
+        body = json.dumps(data).encode()
+        await self.send_head(
+            writer,
+            status,
+            {"Content-Type": "application/json", "Content-Length": len(body)},
+        )
+        writer.write(body)
+        await writer.drain()
+
+    async def send_body(self, writer, body: bytes, headers: dict) -> None:
+        # Chunked, so slow clients only hold back one chunk at a time
+        await self.send_head(
+            writer,
+            200,
+            {
+                "Content-Type": "application/pdf",
+                "Transfer-Encoding": "chunked",
+                **headers,
+            },
+        )
+        view = memoryview(body)
+        for offset in range(0, len(view), STREAM_CHUNK_SIZE):
+            chunk = view[offset : offset + STREAM_CHUNK_SIZE]
+            writer.write(b"%X\r\n" % len(chunk))
+            writer.write(chunk)
+            writer.write(b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def serve(args) -> None:
+    server = JobServer(args.workers, args.max_queue, args.max_upload * 2**20)
+    if args.unix:
+        listener = await asyncio.start_unix_server(
+            server.handle_connection, path=args.unix
+        )
+        address = args.unix
+    else:
+        listener = await asyncio.start_server(
+            server.handle_connection, host=args.host, port=args.port
+        )
+        address = f"http://{args.host}:{args.port}"
+    print(f"Serving PDF_Tool on {address} with {args.workers} worker(s)", flush=True)
+
+    # Shut the pool down on SIGTERM too, otherwise its workers outlive us
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            # Windows, Ctrl+C still ends asyncio.run with KeyboardInterrupt
+            pass
+    try:
+        async with listener:
+            await stop.wait()
+    finally:
+        server.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="\n".join(__doc__.splitlines()[1:]),
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        choices=["127.0.0.1", "localhost", "::1"],
+        help="Loopback address to listen on",
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--unix", metavar="PATH", help="Listen on a Unix socket instead"
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes",
+    )
+    parser.add_argument(
+        "--max-queue",
+        type=int,
+        default=64,
+        help="Jobs allowed to wait for a worker, more are rejected with 503",
+    )
+    parser.add_argument(
+        "--max-upload", type=int, default=512, metavar="MB", help="Largest upload"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,89 @@
+from collections import OrderedDict
+
+# Like typing.TYPE_CHECKING, without importing typing at GUI startup
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+def pixmap_to_image(pix) -> "Image.Image":
+    """Build a PIL image straight from the pixmap sample buffer.
+
+    The raw samples are unpacked once into the image, no PPM/PNG encoding
+    and decoding in between.
+    """
+    # Imported here so the GUI can create its RenderCache before Pillow loads
+    from PIL import Image
+
+    if pix.alpha:
+        mode = "LA" if pix.n == 2 else "RGBA"
+    else:
+        mode = {1: "L", 3: "RGB", 4: "CMYK"}[pix.n]
+    return Image.frombytes(
+        mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride
+    )
+
+
+# Bytes Pillow stores per pixel; multi-band images use 4 bytes even for RGB
+BYTES_PER_PIXEL = {"1": 1, "L": 1, "P": 1, "I;16": 2}
+
+
+class RenderCache:
+    """Bounded LRU cache of rendered page images.
+
+    Entries are keyed by (document identity, page index, zoom) and evicted
+    least recently used first once the decoded size exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def key(doc, page_index: int, zoom: float) -> tuple:
+        return (id(doc), page_index, round(zoom, 2))
+
+    @staticmethod
+    def tile_key(doc, page_index: int, zoom: float, column: int, row: int) -> tuple:
+        return (id(doc), page_index, round(zoom, 2), column, row)
+
+    @staticmethod
+    def image_size(image) -> int:
+        return image.width * image.height * BYTES_PER_PIXEL.get(image.mode, 4)
+
+    def get(self, key):
+        image = self._entries.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def put(self, key, image) -> None:
+        size = self.image_size(image)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size_bytes -= self.image_size(self._entries.pop(key))
+        self._entries[key] = image
+        self.size_bytes += size
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= self.image_size(evicted)
+
+    def invalidate(self, doc) -> None:
+        """Drop all entries of a document, call before it is closed or changed."""
+        doc_id = id(doc)
+        for key in [key for key in self._entries if key[0] == doc_id]:
+            self.size_bytes -= self.image_size(self._entries.pop(key))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
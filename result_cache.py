@@ -0,0 +1,119 @@
+import os
+import sys
+
+# hashlib, json, shutil and tempfile are imported in the methods that use
+# them, the GUI imports this module before its window appears
+# Bump when a change to PDF_Tool alters the output for the same settings
+CACHE_VERSION = 1
+
+
+def get_default_cache_dir() -> str:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(base, "pdf_tool", "results")
+
+
+class ResultCache:
+    """On-disk cache of processed PDFs keyed by input content and settings.
+
+    Entries are plain files named by key; their modification time is the
+    last use, and the least recently used ones are evicted once the total
+    size exceeds max_bytes.
+    """
+
+    def __init__(self, directory: str = "", max_bytes: int = 2 * 1024**3):
+        self.directory = directory or get_default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._digests = {}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def digest(self, input_pdf_path: str) -> str:
+        """SHA-256 of the input file, remembered per path, size and mtime."""
+        import hashlib
+
+        stat = os.stat(input_pdf_path)
+        memo_key = (os.path.abspath(input_pdf_path), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(input_pdf_path, "rb") as file:
+                for block in iter(lambda: file.read(1024 * 1024), b""):
+                    sha.update(block)
+            digest = self._digests[memo_key] = sha.hexdigest()
+        return digest
+
+    def key(self, input_pdf_path: str, settings: dict) -> str:
+        """Key for an input file and every setting that affects the output."""
+        import json
+        import hashlib
+
+        sha = hashlib.sha256(self.digest(input_pdf_path).encode())
+        sha.update(json.dumps([CACHE_VERSION, settings], sort_keys=True).encode())
+        return sha.hexdigest()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pdf")
+
+    def get(self, key: str) -> "str | None":
+        """Path of the cached output, or None. A hit marks the entry as used."""
+        path = self.__path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, output_pdf_path: str) -> None:
+        import shutil
+        import tempfile
+
+        # Copy next to the final name first, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        os.close(fd)
+        try:
+            shutil.copyfile(output_pdf_path, temp_path)
+            os.replace(temp_path, self.__path(key))
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # Already evicted by another process
+                pass
+            total -= size
+
+    def getStats(self) -> dict:
+        entries = [
+            entry.stat().st_size
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".pdf")
+        ]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(entries),
+        }
@@ -0,0 +1,14 @@
+import statistics
+
+from benchmarks.import_budget import BUDGET_MS, LAZY_MODULES, MODULE, measure_imports
+
+
+def test_gui_entry_point_imports_backends_lazily():
+    imported = {name.split(".")[0] for name in measure_imports(MODULE)}
+    assert not imported.intersection(LAZY_MODULES)
+
+
+def test_gui_entry_point_import_time_within_budget():
+    # Median of cold imports in fresh interpreters, in milliseconds
+    runs = [measure_imports(MODULE)[MODULE] / 1000 for _ in range(3)]
+    assert statistics.median(runs) <= BUDGET_MS
@@ -0,0 +1,216 @@
+import io
+
+import fitz
+import pytest
+
+from PDF_Tool import PDF_Tool
+
+
+def make_pdf(pages: int = 2, sizes=((595, 842),)) -> bytes:
+    document = fitz.open()
+    for number in range(pages):
+        width, height = sizes[number % len(sizes)]
+        page = document.new_page(width=width, height=height)
+        page.insert_text((72, 72), "content")
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def make_tool(bleed: float = 3) -> PDF_Tool:
+    return (
+        PDF_Tool()
+        .setNettoFormat(150, 200)
+        .setBleedSize(bleed)
+        .setSafeMarginSize(5)
+        .setAdditionalMargin(10)
+    )
+
+
+def frame_annotations(tool: PDF_Tool) -> list:
+    # Rounded, the annotation rect round-trips through float32
+    return [
+        [tuple(round(value, 2) for value in annot.rect) for annot in page.annots()]
+        for page in tool.output_pdf
+    ]
+
+
+def test_update_annotations_replaces_frames():
+    source = make_pdf()
+    tool = make_tool()
+    tool.loadPDF(source).addPagesWithMarginAndAnnotations()
+    before = frame_annotations(tool)
+
+    tool.setBleedSize(5).updateAnnotations()
+    after = frame_annotations(tool)
+
+    expected = make_tool(bleed=5)
+    expected.loadPDF(source).addPagesWithMarginAndAnnotations()
+    assert [len(rects) for rects in after] == [len(rects) for rects in before]
+    assert after == frame_annotations(expected)
+    assert after != before
+    tool.close()
+    expected.close()
+
+
+@pytest.mark.parametrize(
+    "before, after",
+    [((True, True, True), (True, False, True)), ((False, True, False), (True,) * 3)],
+)
+def test_update_annotations_changes_frame_options(before, after):
+    source = make_pdf(5, sizes=((595, 842), (842, 595)))
+    tool = make_tool()
+    tool.loadPDF(source).addPagesWithMarginAndAnnotations(*before)
+    tool.setBleedSize(5).setAnnotationWidth(2).updateAnnotations(*after)
+
+    expected = make_tool(bleed=5).setAnnotationWidth(2)
+    expected.loadPDF(source).addPagesWithMarginAndAnnotations(*after)
+    assert frame_annotations(tool) == frame_annotations(expected)
+    for page, expected_page in zip(tool.output_pdf, expected.output_pdf):
+        assert [annot.colors for annot in page.annots()] == [
+            annot.colors for annot in expected_page.annots()
+        ]
+        assert [annot.border["width"] for annot in page.annots()] == [2] * sum(after)
+    tool.close()
+    expected.close()
+
+
+def test_update_annotations_shares_appearance_per_page_size():
+    tool = make_tool()
+    tool.loadPDF(make_pdf(4, sizes=((595, 842), (842, 595))))
+    tool.addPagesWithMarginAndAnnotations().setBleedSize(5).updateAnnotations()
+
+    appearances = [
+        [
+            tool.output_pdf.xref_get_key(xref, "AP/N")[1]
+            for xref, _, _ in page.annot_xrefs()
+        ]
+        for page in tool.output_pdf
+    ]
+    assert appearances[0] == appearances[2]
+    assert appearances[1] == appearances[3]
+    assert appearances[0] != appearances[1]
+
+    # The rewritten annotations survive a save with garbage collection
+    reopened = fitz.open(stream=tool.output_pdf.tobytes(garbage=4), filetype="pdf")
+    assert [len(list(page.annots())) for page in reopened] == [3] * 4
+    reopened.close()
+    tool.close()
+
+
+def test_update_annotations_single_annotation_page():
+    tool = make_tool()
+    tool.loadPDF(make_pdf(1)).addPagesWithMarginAndAnnotations(
+        netto=True, bleed=False, safe_margin=False
+    )
+    tool.updateAnnotations(netto=True, bleed=False, safe_margin=False)
+    assert len(frame_annotations(tool)[0]) == 1
+    tool.close()
+
+
+@pytest.mark.parametrize("chunk_size", [0, -5])
+def test_stream_process_rejects_chunk_size(tmp_path, chunk_size):
+    with pytest.raises(ValueError):
+        make_tool().streamProcess(make_pdf(), str(tmp_path / "out.pdf"), chunk_size)
+    assert not (tmp_path / "out.pdf").exists()
+
+
+def test_deduplicated_bytes_is_the_saved_size(tmp_path):
+    # The same image embedded twice, as in merged or imposed files
+    image = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+    image.set_rect(image.irect, (200, 30, 30))
+    document = fitz.open()
+    for _ in range(2):
+        page = document.new_page(width=595, height=842)
+        page.insert_image(page.rect, stream=image.tobytes())
+    source = document.tobytes()
+    document.close()
+
+    plain = make_tool().loadPDF(source).addPagesWithMarginAndAnnotations()
+    plain.savePDF(str(tmp_path / "plain.pdf"))
+    tool = make_tool().loadPDF(source).addPagesWithMarginAndAnnotations()
+    tool.deduplicateResources().savePDF(str(tmp_path / "dedup.pdf"))
+
+    assert tool.deduplicated_bytes > 0
+    assert tool.deduplicated_bytes == plain.save_size - tool.save_size
+    plain.close()
+    tool.close()
+
+
+def test_load_pdf_reads_file_like_input(tmp_path):
+    tool = make_tool().loadPDF(io.BytesIO(make_pdf(3)))
+    assert tool.original_pdf.page_count == 3
+    assert tool.input_pdf_path == ""
+
+    output = tmp_path / "out.pdf"
+    tool.streamProcess(io.BytesIO(make_pdf(3)), str(output), chunk_size=2)
+    with fitz.open(output) as document:
+        assert document.page_count == 3 + tool.getInfoPageTemplate().page_count
+    tool.close()
+
+
+def test_load_pdf_rejects_other_types_before_opening():
+    tool = make_tool().loadPDF(make_pdf(1))
+    loaded = tool.original_pdf
+    with pytest.raises(TypeError):
+        tool.loadPDF(42)
+    assert tool.original_pdf is loaded
+    tool.close()
+
+
+def source_rect(tool: PDF_Tool, frame: str) -> fitz.Rect:
+    """A frame of an A4 page in source page coordinates."""
+    geometry = tool.getPageGeometry(595, 842)
+    rect = getattr(geometry, frame)
+    dx, dy = geometry.placement.x0, geometry.placement.y0
+    return fitz.Rect(rect.x0 - dx, rect.y0 - dy, rect.x1 - dx, rect.y1 - dy)
+
+
+def make_preflight_pdf(path, tool: PDF_Tool) -> None:
+    document = fitz.open()
+    # Artwork exactly netto-sized, artwork reaching the bleed
+    for frame in ("netto", "bleed"):
+        page = document.new_page(width=595, height=842)
+        page.draw_rect(source_rect(tool, frame), color=None, fill=(0.2, 0.4, 0.8))
+    # Text starting between the netto and the safe margin edge
+    page = document.new_page(width=595, height=842)
+    safe = source_rect(tool, "safe_margin")
+    page.insert_text((safe.x0 - 6, (safe.y0 + safe.y1) / 2), "crossing the margin")
+    document.new_page(width=595, height=842)
+    document.save(path)
+    document.close()
+
+
+def test_preflight_classifies_pages(tmp_path):
+    tool = make_tool()
+    path = str(tmp_path / "preflight.pdf")
+    make_preflight_pdf(path, tool)
+    results = tool.loadPDF(path).runPreflight().preflight_results
+
+    netto, bleed, text, empty = results
+    assert netto == PDF_Tool.PreflightResult(0, 0, ("left", "top", "right", "bottom"))
+    assert bleed.passed
+    assert text == PDF_Tool.PreflightResult(2, 1, ())
+    assert empty.passed
+    tool.close()
+
+
+def test_preflight_recheck_uses_cached_boxes(tmp_path, monkeypatch):
+    tool = make_tool()
+    path = str(tmp_path / "preflight.pdf")
+    make_preflight_pdf(path, tool)
+    tool.loadPDF(path).runPreflight()
+    assert tool.preflight_results[1].passed
+
+    calls = []
+    get_bboxlog = fitz.Page.get_bboxlog
+    monkeypatch.setattr(
+        fitz.Page,
+        "get_bboxlog",
+        lambda page, *args, **kwargs: calls.append(page) or get_bboxlog(page),
+    )
+    tool.setBleedSize(5).runPreflight()
+    assert calls == []
+    # The artwork that reached a 3 mm bleed is short of a 5 mm one
+    assert tool.preflight_results[1].short_bleed == ("left", "top", "right", "bottom")
+    tool.close()